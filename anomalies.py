@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+# Spike and stall detection over per-second aggregates of a day: the number
+# of events (throughput) and the slowest event of each stage. Each stream is
+# compared, in log space, with an exponentially weighted mean and variance of
+# the seconds before it. Seconds more than Z_THRESHOLD standard deviations
+# above it (latency) or below it (throughput) are flagged and kept out of the
+# baseline, so a long incident does not become the new normal. Flagged
+# seconds at most MERGE_GAP apart form one incident, which is reported once
+# it has MIN_FLAGGED seconds; a single odd second is mostly noise. The state
+# carries from one batch of seconds to the next, so live mode runs the same
+# detector incrementally and finds the same incidents as a pass over the
+# whole day. The slowest event is used rather than a percentile because it
+# merges exactly across a second that arrives in two polls.
+
+HALFLIFE = 60  # seconds
+ALPHA = 1 - 0.5 ** (1 / HALFLIFE)
+Z_THRESHOLD = 4.0
+# Floor on the standard deviation (log units) so a very steady stretch does
+# not turn small wiggles into incidents
+MIN_STD = 0.1
+WARMUP = 30  # seconds of data before a stream can flag anything
+MERGE_GAP = 5  # seconds
+MIN_FLAGGED = 2  # seconds
+# Most passes of flagging and re-baselining without the flagged seconds.
+# A second's flag only depends on the seconds before it, so the passes
+# settle on the flags a second-by-second loop would give, usually in a few.
+MAX_BASELINE_PASSES = 100
+THROUGHPUT = 'throughput'
+INCIDENT_COLUMNS = ['start', 'end', 'duration', 'kind', 'stage', 'peak', 'baseline', 'z']
+
+
+# Exponentially weighted mean of values continuing from initial (NaN for
+# none); NaN values leave the mean where it was
+def _ewm(values, initial):
+    series = pd.Series(np.concatenate([[initial], values]))
+    return series.ewm(alpha=ALPHA, adjust=False, ignore_na=True).mean().to_numpy()[1:]
+
+
+# Mean and standard deviation of the values before each one. state is
+# (mean, mean of squares, count) and the updated one is returned too.
+def _baseline(values, state):
+    mean0, square0, n0 = state or (np.nan, np.nan, 0)
+    mean = _ewm(values, mean0)
+    square = _ewm(values ** 2, square0)
+    n = n0 + np.cumsum(~np.isnan(values))
+    prev_mean = np.concatenate([[mean0], mean[:-1]])
+    prev_square = np.concatenate([[square0], square[:-1]])
+    prev_n = np.concatenate([[n0], n[:-1]])
+    std = np.maximum(np.sqrt(np.maximum(prev_square - prev_mean ** 2, 0)), MIN_STD)
+    std[prev_n < WARMUP] = np.nan
+    if len(values):
+        state = (float(mean[-1]), float(square[-1]), int(n[-1]))
+    return prev_mean, std, state
+
+
+# z-scores of values against their baseline, which leaves out the seconds
+# flagged by direction * z > Z_THRESHOLD. Returns the flags, z-scores and
+# baseline means, and the new state.
+def score(values, state=None, direction=1):
+    flagged = np.zeros(len(values), dtype=bool)
+    for _ in range(MAX_BASELINE_PASSES):
+        mean, std, new_state = _baseline(np.where(flagged, np.nan, values), state)
+        z = (values - mean) / std
+        with np.errstate(invalid='ignore'):
+            previous, flagged = flagged, direction * z > Z_THRESHOLD
+        if np.array_equal(previous, flagged):
+            break
+    return flagged, z, mean, new_state
+
+
+# Incident records from the flagged seconds of one stream, counting the
+# flagged seconds in each
+def find_incidents(seconds, flagged, kind, stage, peak, baseline, z):
+    idx = np.flatnonzero(flagged)
+    if len(idx) == 0:
+        return []
+    incidents = []
+    for group in np.split(idx, np.flatnonzero(np.diff(seconds[idx]) > MERGE_GAP) + 1):
+        worst = group[np.nanargmin(peak[group])] if kind == 'stall' else group[np.nanargmax(peak[group])]
+        incidents.append({
+            'start': int(seconds[group[0]]),
+            'end': int(seconds[group[-1]]) + 1,
+            'kind': kind,
+            'stage': stage,
+            'peak': float(peak[worst]),
+            'baseline': float(baseline[worst]),
+            'z': float(np.nanmax(np.abs(z[group]))),
+            'flagged': len(group),
+        })
+    return incidents
+
+
+# Adds new incidents to a list, extending an incident of the same stream that
+# ended at most MERGE_GAP seconds before the new one starts
+def merge_incidents(incidents, new):
+    for incident in new:
+        previous = next((old for old in reversed(incidents)
+                         if old['kind'] == incident['kind'] and old['stage'] == incident['stage']), None)
+        if previous is not None and incident['start'] - previous['end'] < MERGE_GAP:
+            worse = min if incident['kind'] == 'stall' else max
+            if worse(previous['peak'], incident['peak']) != previous['peak']:
+                previous['peak'], previous['baseline'] = incident['peak'], incident['baseline']
+            previous['end'] = max(previous['end'], incident['end'])
+            previous['z'] = max(previous['z'], incident['z'])
+            previous['flagged'] += incident['flagged']
+        else:
+            incidents.append(dict(incident))
+    return incidents
+
+
+class IncidentDetector:
+    # state is what to_state() returned, e.g. from the previous live poll
+    def __init__(self, state=None):
+        state = state or {}
+        self.next_second = state.get('next_second')
+        # Stored state has been through JSON, where NaN became None
+        self.streams = {name: tuple(np.nan if v is None else v for v in value) for name, value in state.get('streams', {}).items()}
+        # Every run of flagged seconds so far, including ones too short to
+        # report yet, since the next batch may extend them
+        self.candidates = [dict(incident) for incident in state.get('candidates', [])]
+
+    def to_state(self):
+        return {'next_second': self.next_second, 'streams': self.streams, 'candidates': self.candidates}
+
+    @property
+    def incidents(self):
+        return [incident for incident in self.candidates if incident['flagged'] >= MIN_FLAGGED]
+
+    # Feeds complete seconds: epoch seconds in increasing order, the number
+    # of events in each and the slowest event of each stage (NaN if none).
+    # Seconds missing in between, or since the previous batch, had no events.
+    # Returns the number of incidents reported so far.
+    def update(self, seconds, counts, peaks):
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if self.next_second is not None:
+            keep = seconds >= self.next_second
+            seconds, counts = seconds[keep], np.asarray(counts)[keep]
+            peaks = {stage: np.asarray(values)[keep] for stage, values in peaks.items()}
+        if len(seconds) == 0:
+            return len(self.incidents)
+        first = seconds[0] if self.next_second is None else self.next_second
+        span = np.arange(first, seconds[-1] + 1)
+        position = seconds - first
+        filled_counts = np.zeros(len(span))
+        filled_counts[position] = counts
+
+        new = []
+        flagged, z, baseline, self.streams[THROUGHPUT] = score(np.log1p(filled_counts), self.streams.get(THROUGHPUT), direction=-1)
+        new += find_incidents(span, flagged, 'stall', THROUGHPUT, filled_counts, np.expm1(baseline), z)
+        for stage, values in peaks.items():
+            filled = np.full(len(span), np.nan)
+            filled[position] = values
+            flagged, z, baseline, self.streams[stage] = score(np.log(np.maximum(filled, 1)), self.streams.get(stage))
+            new += find_incidents(span, flagged, 'spike', stage, filled, np.exp(baseline), z)
+
+        self.next_second = int(span[-1]) + 1
+        merge_incidents(self.candidates, sorted(new, key=lambda incident: incident['start']))
+        return len(self.incidents)
+
+
+# The incidents as a table for display: times of day, duration in seconds
+def incident_frame(incidents):
+    frame = pd.DataFrame(incidents, columns=[c for c in INCIDENT_COLUMNS if c != 'duration'])
+    frame['duration'] = frame['end'] - frame['start']
+    for column in ('start', 'end'):
+        frame[column] = pd.to_datetime(frame[column], unit='s').dt.strftime('%H:%M:%S')
+    frame[['peak', 'baseline']] = frame[['peak', 'baseline']].round(0)
+    frame['z'] = frame['z'].round(1)
+    return frame[INCIDENT_COLUMNS].sort_values('start', kind='stable')
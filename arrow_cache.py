@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.ipc
+
+import metrics
+
+# On-disk cache of Arrow IPC files: converted datasets, which are memory-mapped
+# back rather than read, and small aggregate tables. Keys are hashed from the
+# caller's parts, which should include the source file's size and mtime, so a
+# changed file never hits an old entry. Reading an entry marks it as used, and
+# the least recently used files are removed once the directory exceeds its
+# quota, which also disposes of entries for files that have since changed.
+
+CACHE_DIR = '.arrow-cache'
+CACHE_QUOTA_BYTES = 2 * 1024 ** 3
+
+
+def cache_key(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()[:16]
+
+
+def table_metadata(table, name):
+    metadata = table.schema.metadata or {}
+    value = metadata.get(name.encode())
+    return json.loads(value) if value is not None else None
+
+
+class ArrowCache:
+    def __init__(self, directory=CACHE_DIR, quota_bytes=CACHE_QUOTA_BYTES):
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.lock = threading.Lock()
+
+    def path(self, name, *key_parts):
+        return os.path.join(self.directory, f'{name}-{cache_key(*key_parts)}.arrow')
+
+    # True if the entry exists; its mtime is bumped so it counts as recently used
+    def touch(self, path):
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def temp_path(self, path):
+        os.makedirs(self.directory, exist_ok=True)
+        return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    def write_table(self, table, path):
+        tmp_path = self.temp_path(path)
+        with pa.ipc.new_file(tmp_path, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def read_table(self, path):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    # A cached aggregate: compute() is only called on a miss and must return a
+    # pyarrow Table (scalars can go in its schema metadata)
+    def table(self, name, key_parts, compute):
+        path = self.path(name, *key_parts)
+        if self.touch(path):
+            try:
+                table = self.read_table(path)
+                metrics.inc('dash_cache_requests_total', cache='arrow', result='hit')
+                return table
+            except (OSError, pa.ArrowInvalid):
+                pass
+        metrics.inc('dash_cache_requests_total', cache='arrow', result='miss')
+        table = compute()
+        self.write_table(table, path)
+        self.evict(keep=(path,))
+        return table
+
+    # Removes the least recently used entries until the cache fits its quota.
+    # Files still mapped by a reader stay readable until they are closed.
+    def evict(self, keep=()):
+        with self.lock:
+            try:
+                entries = []
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith('.arrow'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            except FileNotFoundError:
+                return
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.quota_bytes:
+                    break
+                if path in keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
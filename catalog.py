@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+# Index of the per-day data files in a directory. Listing the days only needs
+# a directory scan, so it is ready as soon as the app starts; the slower
+# metadata (row count, T2 range) is filled in by a background thread and kept
+# in a small JSON file, so a restart does not have to rescan unchanged days.
+
+CATALOG_FILE = '.catalog.json'
+DAY_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.(csv)$')
+REFRESH_INTERVAL = 30  # seconds
+
+
+def scan_directory(directory):
+    files = {}
+    for entry in os.scandir(directory):
+        match = DAY_FILE_PATTERN.match(entry.name)
+        if not match or not entry.is_file():
+            continue
+        stat = entry.stat()
+        files[match.group(1)] = {
+            'path': entry.path,
+            'format': match.group(2),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+    return files
+
+
+def describe_csv(path):
+    t2 = pd.to_datetime(pd.read_csv(path, usecols=['T2'])['T2'])
+    if t2.empty:
+        return {'rows': 0, 't2_min': None, 't2_max': None}
+    return {'rows': len(t2), 't2_min': str(t2.min()), 't2_max': str(t2.max())}
+
+
+DESCRIBERS = {
+    'csv': describe_csv,
+}
+
+
+def describe(entry):
+    try:
+        return DESCRIBERS[entry['format']](entry['path'])
+    except (OSError, ValueError, pd.errors.ParserError) as e:
+        print(f"Warning: could not index {entry['path']}: {e}")
+        return {'rows': None, 't2_min': None, 't2_max': None, 'error': str(e)}
+
+
+def same_file(a, b):
+    return a is not None and a['size'] == b['size'] and a['mtime_ns'] == b['mtime_ns']
+
+
+class Catalog:
+    def __init__(self, directory='.', catalog_file=CATALOG_FILE):
+        self.directory = directory
+        self.catalog_path = os.path.join(directory, catalog_file)
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self._thread = None
+        # Listing is cheap, so the set of days is correct right away; only the
+        # metadata of new or changed files is left for refresh()
+        self._merge(scan_directory(directory))
+
+    def _load(self):
+        try:
+            with open(self.catalog_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Every server process refreshes its own catalog, so each writes through
+    # its own temporary file
+    def _save(self):
+        tmp_path = f'{self.catalog_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with self.lock:
+            snapshot = dict(self.entries)
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.catalog_path)
+
+    # Replaces the file list with a fresh scan, keeping metadata only for
+    # files whose size and mtime are unchanged. Returns the days that still
+    # need describing and whether anything differs from the previous list.
+    def _merge(self, files):
+        with self.lock:
+            merged = {}
+            for day, entry in files.items():
+                known = self.entries.get(day)
+                merged[day] = known if same_file(known, entry) else entry
+            changed = merged.keys() != self.entries.keys() or any(merged[d] is not self.entries[d] for d in merged)
+            self.entries = merged
+            stale = [day for day, entry in merged.items() if 'rows' not in entry]
+        return stale, changed
+
+    def refresh(self):
+        stale, changed = self._merge(scan_directory(self.directory))
+        for day in sorted(stale, reverse=True):
+            with self.lock:
+                entry = self.entries.get(day)
+            if entry is None:
+                continue
+            described = {**entry, **describe(entry)}
+            with self.lock:
+                # Skip the result if the file changed again while we read it
+                if self.entries.get(day) is entry:
+                    self.entries[day] = described
+        if stale or changed:
+            self._save()
+
+    def start(self, interval=REFRESH_INTERVAL):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            try:
+                self.refresh()
+            except OSError as e:
+                print(f"Warning: catalog refresh failed: {e}")
+            time.sleep(interval)
+
+    def get(self, day):
+        with self.lock:
+            return self.entries.get(day)
+
+    def dates(self):
+        with self.lock:
+            return sorted(self.entries)
+
+    # Every day between the first and last available one that has no file,
+    # in the form dcc.DatePickerSingle expects for disabled_days
+    def missing_dates(self):
+        days = self.dates()
+        if not days:
+            return []
+        present = set(days)
+        first, last = date.fromisoformat(days[0]), date.fromisoformat(days[-1])
+        missing = []
+        for offset in range((last - first).days + 1):
+            day = (first + timedelta(days=offset)).isoformat()
+            if day not in present:
+                missing.append(day)
+        return missing
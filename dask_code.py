@@ -6,19 +6,26 @@ import plotly.express as px
 import plotly.graph_objs as go
 from datetime import datetime
 import os
-import dask.dataframe as dd
+import json
+import time
+import threading
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import vaex
-from flask_caching import Cache
+import metrics
+import profiling
+from arrow_cache import ArrowCache, table_metadata
+from catalog import Catalog
+from day_sample import StratifiedSample, TOP_K_SLOWEST
 
 # Initialize the Dash app
 app = dash.Dash(__name__)
+metrics.init_app(app)
 
-# Setup caching
-cache = Cache(app.server, config={
-    'CACHE_TYPE': 'filesystem',
-    'CACHE_DIR': 'cache-directory'
-})
-TIMEOUT = 60 * 60  # 1 hour
+# Setup caching. Converted days and computed aggregates are Arrow files keyed
+# by the source file's size and mtime, within a fixed disk quota.
+arrow_cache = ArrowCache()
 
 # Custom CSS for the app (unchanged)
 app.index_string = '''
@@ -44,78 +51,162 @@ app.index_string = '''
 </html>
 '''
 
+# Each day is converted once into an Arrow IPC file in the cache, which vaex
+# memory-maps instead of reading into RAM. Every aggregation below runs
+# lazily over that mapping in chunks, so peak memory stays far below the file
+# size. Cache keys carry the CSV's size and mtime, so a changed CSV gets a
+# fresh conversion instead of stale data.
+CONVERT_CHUNK_ROWS = 100_000
+HISTOGRAM_BINS = 100
+latency_columns = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+convert_lock = threading.Lock()
+
+# Path, mtime and size of a day's file as it is now. The catalog only says
+# which days exist: its metadata can be a refresh behind the file, and a key
+# taken from it would file a new version's data under the old one's.
+def data_version(date):
+    entry = catalog.get(date)
+    if entry is None:
+        return None
+    try:
+        stat = os.stat(entry['path'])
+    except FileNotFoundError:
+        return None
+    return entry['path'], stat.st_mtime_ns, stat.st_size
+
+def source_key(version):
+    return (version[2], version[1])
+
+# Streams the CSV into an Arrow file chunk by chunk, so only one chunk is ever
+# held in memory. T2 is parsed here once instead of on every load, and the
+# day's table sample is drawn in the same pass and returned.
+def convert_csv(filename, path):
+    header = pd.read_csv(filename, nrows=0).columns
+    dtypes = {col: 'float64' for col in latency_columns if col in header}
+    tmp_path = arrow_cache.temp_path(path)
+    sample = StratifiedSample()
+    writer = None
+    try:
+        for chunk in pd.read_csv(filename, chunksize=CONVERT_CHUNK_ROWS, dtype=dtypes, parse_dates=['T2']):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(tmp_path, schema)
+            writer.write_table(table.cast(schema))
+            sample.add(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return pa.Table.from_pandas(sample.result(), preserve_index=False)
+
+# Paths of the day's converted data and sample, converting first if either
+# is missing from the cache
+def ensure_columnar(date, version=None):
+    version = version or data_version(date)
+    if version is None:
+        return None
+    path = arrow_cache.path(f'{date}.data', *source_key(version))
+    sample_file = arrow_cache.path(f'{date}.sample', *source_key(version))
+    with convert_lock:
+        hit = arrow_cache.touch(path) and arrow_cache.touch(sample_file)
+        metrics.inc('dash_cache_requests_total', cache='columnar', result='hit' if hit else 'miss')
+        if not hit:
+            sample = convert_csv(version[0], path)
+            arrow_cache.write_table(sample, sample_file)
+            arrow_cache.evict(keep=(path, sample_file))
+    return path, sample_file
+
 # Function to load data based on selected date
-@cache.memoize(timeout=TIMEOUT)
-def load_data(date):
-    filename = f"{date}.csv"
+def load_data(date, version=None):
+    start = time.perf_counter()
     try:
-        # Use Dask for out-of-memory computations
-        df = dd.read_csv(filename)
-        
-        # Convert to Vaex DataFrame for faster processing
-        df = vaex.from_pandas(df.compute())
-        
-        # Perform necessary data transformations
-        df['T2'] = df['T2'].astype('datetime64')
-        df['T2_seconds'] = df['T2'].dt.floor('1s')
-        df['T2_formatted'] = df['T2'].dt.strftime('%H:%M:%S.%f')
-        
-        # Ensure latency columns are in nanoseconds
-        latency_columns = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
-        for col in latency_columns:
-            if col in df.column_names:
-                df[col] = df[col].astype('float64')
-            else:
-                print(f"Warning: Column {col} not found in the CSV file.")
-        
-        return df
+        paths = ensure_columnar(date, version)
     except FileNotFoundError:
-        return vaex.from_pandas(pd.DataFrame())  # Return empty DataFrame if file not found
+        paths = None
+    if paths is None:
+        return vaex.from_pandas(pd.DataFrame({'T2': []}))  # Return empty DataFrame if file not found
 
-# Get list of available dates from CSV files
-available_dates = [f.split('.')[0] for f in os.listdir() if f.endswith('.csv') and f[0].isdigit()]
-initial_date = max(available_dates) if available_dates else datetime.now().strftime("%Y-%m-%d")
+    df = vaex.open(paths[0])
+    metrics.observe('dash_load_data_duration_seconds', time.perf_counter() - start)
+    metrics.inc('dash_load_data_rows_total', len(df))
 
-# Initial data load
-df = load_data(initial_date)
+    # Derived columns are virtual: expressions evaluated per chunk on demand
+    df['T2_seconds'] = df['T2'].dt.floor('1s')
+    df['T2_formatted'] = df['T2'].dt.strftime('%H:%M:%S.%f')
 
-# Define the layout (unchanged)
-app.layout = html.Div([
-    html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
-    
-    html.Div([
-        dcc.DatePickerSingle(
-            id='date-picker',
-            date=initial_date,
-            display_format='YYYY-MM-DD',
-            style={'margin': '10px'}
-        ),
-        html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
-
-    html.Div(id='content-container')
-], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+    for col in latency_columns:
+        if col not in df.column_names:
+            print(f"Warning: Column {col} not found in the CSV file.")
+
+    return df
+
+# The fixed per-day sample the tables show, written by convert_csv
+def load_sample(date):
+    paths = ensure_columnar(date)
+    if paths is None:
+        return pd.DataFrame()
+    sample = arrow_cache.read_table(paths[1]).to_pandas()
+    sample['T2_formatted'] = sample['T2'].dt.strftime('%H:%M:%S.%f')
+    return sample
+
+# Records per T2 second over the whole day, cached per file version
+def t2_second_counts(date, version, df):
+    def compute():
+        counts = df['T2_seconds'].value_counts().sort_index()
+        return pa.table({'second': pd.to_datetime(counts.index), 'count': counts.values})
+    return arrow_cache.table(f'{date}.t2-seconds', source_key(version), compute)
+
+# Available days come from the catalog; nothing is loaded at import time, so
+# the server accepts requests immediately
+catalog = Catalog()
+catalog.start()
+
+# Define the layout. It is served per page load so the date picker always
+# reflects the current catalog.
+def serve_layout():
+    available_dates = catalog.dates()
+    initial_date = available_dates[-1] if available_dates else datetime.now().strftime("%Y-%m-%d")
+
+    return html.Div([
+        html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
+
+        html.Div([
+            dcc.DatePickerSingle(
+                id='date-picker',
+                date=initial_date,
+                display_format='YYYY-MM-DD',
+                min_date_allowed=available_dates[0] if available_dates else None,
+                max_date_allowed=initial_date,
+                disabled_days=catalog.missing_dates(),
+                style={'margin': '10px'}
+            ),
+            html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+
+        html.Div(id='content-container')
+    ], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+
+app.layout = serve_layout
 
 @app.callback(
     Output('content-container', 'children'),
     [Input('date-picker', 'date'),
      Input('toggle-view', 'n_clicks')]
 )
+@profiling.profiled
 def update_dashboard(selected_date, n_clicks):
-    df = load_data(selected_date)
+    version = data_version(selected_date)
+    df = load_data(selected_date, version)
     
     if df.shape[0] == 0:
         return html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
 
-    # Sample data for faster processing
-    sample_size = min(100000, df.shape[0])
-    df_sample = df.sample(n=sample_size)
-
-    t2_counts = df_sample['T2_seconds'].value_counts()
-    t2_df = pd.DataFrame({'Timestamp': t2_counts.index.strftime('%H:%M:%S'), 'Count': t2_counts.values})
+    t2_counts = t2_second_counts(selected_date, version, df).to_pandas()
+    t2_df = pd.DataFrame({'Timestamp': t2_counts['second'].dt.strftime('%H:%M:%S'), 'Count': t2_counts['count']})
 
     t2_hist = px.bar(t2_df, x='Timestamp', y='Count', 
-                     title='Number of Records per T2 Second (Sampled)',
+                     title='Number of Records per T2 Second',
                      labels={'Timestamp': 'T2 Timestamp (HH:MM:SS)', 'Count': 'Number of Records'},
                      color='Count', color_continuous_scale=px.colors.sequential.Viridis)
 
@@ -135,15 +226,20 @@ def update_dashboard(selected_date, n_clicks):
     latency_metrics = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
 
     if n_clicks % 2 == 0:
+        # Tables show the day's fixed sample; it is read from disk, not drawn per request
+        sample = load_sample(selected_date)
+        sample_records = sample.drop(columns=['T2']).to_dict('records')
         return [
+            html.P(f"Showing a fixed sample of {len(sample):,} of {df.shape[0]:,} records, including the {TOP_K_SLOWEST} slowest (sort by T5-T2 to find them).", style={'textAlign': 'center', 'color': '#7f8c8d', 'fontSize': '14px'}),
             html.Div([
                 html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
                 html.Div([
                     dash_table.DataTable(
                         id='table1',
-                        columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written'], {"name": "T2", "id": "T2_formatted"},],
-                        data=df_sample.to_pandas_df().to_dict('records'),
+                        columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']] + [{"name": "T2", "id": "T2_formatted"}],
+                        data=sample_records,
                         page_size=5,
+                        sort_action='native',
                         style_cell={
                             'textAlign': 'left',
                             'padding': '10px',
@@ -170,8 +266,9 @@ def update_dashboard(selected_date, n_clicks):
                     dash_table.DataTable(
                         id='table2',
                         columns=[{"name": i, "id": i} for i in ['OptionEMMId', 'UnderlyingEMMId', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2', 'Insert/Update']],
-                        data=df_sample.to_pandas_df().to_dict('records'),
+                        data=sample_records,
                         page_size=5,
+                        sort_action='native',
                         style_cell={
                             'textAlign': 'left',
                             'padding': '10px',
@@ -219,33 +316,221 @@ def update_dashboard(selected_date, n_clicks):
                             {'label': 'Update', 'value': 'U'}
                         ],
                         value='I',  # Set default value to 'I' for Insert
-                        style={'width': '100%', 'marginBottom': '20px'}
+                        style={'width': '45%', 'display': 'inline-block', 'marginRight': '5%'}
+                    ),
+                    dcc.Dropdown(
+                        id='insert-update-metric-dropdown',
+                        options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                        value='T5-T4',
+                        style={'width': '45%', 'display': 'inline-block'}
                     ),
                 ], style={'marginBottom': '20px'}),
                 html.Div(id='insert-update-histogram-card', className='histogram-card')
             ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
         ])
 
-@app.callback(
-    Output('latency-histogram-card', 'children'),
-    [Input('latency-dropdown', 'value'),
-     Input('date-picker', 'date')]
-)
-@cache.memoize(timeout=TIMEOUT)
-def update_latency_histogram(selected_metric, selected_date):
-    df = load_data(selected_date)
-    
-    # Sample data for faster processing
-    sample_size = min(100000, df.shape[0])
-    df_sample = df.sample(n=sample_size)
+INSERT_UPDATE_PERCENTILES = {'p90': 90, 'p99': 99}
+
+# vaex bins are half-open, so the upper limit is nudged up for the maximum to
+# land in the last bin, as it does with np.histogram
+def histogram_limits(lo, hi):
+    return [lo, np.nextafter(hi, np.inf)]
+
+# Exact order statistics without reading a column into memory: each pass
+# bins every target's current interval into PERCENTILE_BINS bins with the
+# count, min and max of each (all targets in one delayed vaex pass, targets
+# on the same interval sharing the binby). A target is settled once the bin
+# holding its rank has a single distinct value (min == max); otherwise its
+# interval narrows to that bin, with a bin either side as slack, and the bin
+# counts keep track of how many values lie below it. Each pass checks that
+# its interval holds as many values as the previous pass counted for it; if
+# float rounding at a bin edge broke that, the target is settled exactly
+# with selections instead.
+PERCENTILE_BINS = 4096
+PERCENTILE_MAX_PASSES = 8
+
+def _and(selection, condition):
+    return condition if selection is None else selection & condition
+
+def _in_interval(df, metric, lo, hi):
+    return (df[metric] >= lo) & (df[metric] <= hi)
+
+# Values of rank k (0-based, in ascending order) for targets of
+# (metric, selection, min, max, k)
+def order_statistics(df, targets):
+    state = [{'lo': lo, 'hi': hi, 'below': 0, 'inside': None} for _, _, lo, hi, _ in targets]
+    results = [None] * len(targets)
+    exact = set()
+    for _ in range(PERCENTILE_MAX_PASSES):
+        pending = [i for i, value in enumerate(results) if value is None and i not in exact]
+        if not pending:
+            break
+        tasks = {}
+        for i in pending:
+            metric, selection, *_ = targets[i]
+            key = (metric, id(selection), state[i]['lo'], state[i]['hi'])
+            if key not in tasks:
+                binned = dict(binby=metric, limits=histogram_limits(state[i]['lo'], state[i]['hi']),
+                              shape=PERCENTILE_BINS, selection=selection, delay=True)
+                tasks[key] = (df.count(metric, **binned), df.min(metric, **binned), df.max(metric, **binned))
+        df.execute()
+        for i in pending:
+            metric, selection, _, _, k = targets[i]
+            interval = state[i]
+            counts, lows, highs = (task.get() for task in tasks[metric, id(selection), interval['lo'], interval['hi']])
+            counts = counts.astype(np.int64)
+            j = min(int(np.searchsorted(interval['below'] + np.cumsum(counts), k, side='right')), PERCENTILE_BINS - 1)
+            if (interval['inside'] is not None and counts.sum() != interval['inside']) or counts[j] == 0:
+                exact.add(i)
+            elif lows[j] == highs[j]:
+                results[i] = float(lows[j])
+            else:
+                first, last = max(j - 1, 0), min(j + 2, PERCENTILE_BINS)
+                edges = np.linspace(interval['lo'], interval['hi'], PERCENTILE_BINS + 1)
+                interval['below'] += int(counts[:first].sum())
+                interval['inside'] = int(counts[first:last].sum())
+                interval['lo'] = edges[first]
+                interval['hi'] = interval['hi'] if last == PERCENTILE_BINS else max(edges[first], np.nextafter(edges[last], -np.inf))
+
+    # Anything left is counted below its interval exactly and read from it
+    rest = [i for i, value in enumerate(results) if value is None]
+    if rest:
+        tasks = {}
+        for i in rest:
+            metric, selection, _, _, _ = targets[i]
+            tasks[i] = df.count(metric, selection=_and(selection, df[metric] < state[i]['lo']), delay=True)
+        df.execute()
+        for i, below in tasks.items():
+            metric, selection, _, _, k = targets[i]
+            values = np.asarray(df.evaluate(metric, selection=_and(selection, _in_interval(df, metric, state[i]['lo'], state[i]['hi']))), dtype='float64')
+            rank = k - int(below.get())
+            results[i] = float(np.partition(values, rank)[rank])
+    return results
+
+# Percentiles interpolated between order statistics the way np.percentile
+# does it, for targets of (metric, selection, min, max, count, percentiles)
+def exact_percentiles(df, targets):
+    ranks = []
+    for metric, selection, lo, hi, count, percentiles in targets:
+        for percentile in percentiles:
+            position = (count - 1) * percentile / 100
+            ranks.append((metric, selection, lo, hi, int(np.floor(position))))
+            ranks.append((metric, selection, lo, hi, min(int(np.floor(position)) + 1, count - 1)))
+    values = iter(order_statistics(df, ranks))
+    results = []
+    for metric, selection, lo, hi, count, percentiles in targets:
+        result = []
+        for percentile in percentiles:
+            position = (count - 1) * percentile / 100
+            below, above = next(values), next(values)
+            result.append(below + (position - np.floor(position)) * (above - below))
+        results.append(result)
+    return results
+
+def empty_histogram():
+    return pa.table({'left': pa.array([], pa.float64()), 'right': pa.array([], pa.float64()), 'count': pa.array([], pa.int64())})
+
+# Histogram and statistics of one latency column, computed by vaex over the
+# whole (memory-mapped) frame: a min/max pass, then one pass that bins and
+# aggregates together, then the exact median (see order_statistics). Returned as a small Arrow table of bins with the
+# statistics in its metadata, which is what gets cached.
+def latency_histogram(df, selected_metric):
+    if len(df) == 0:
+        return empty_histogram()
+
+    lo, max_value = df.minmax(selected_metric)
+    hi = max_value if max_value > lo else lo + 1
+    counts = df.count(binby=selected_metric, limits=histogram_limits(lo, hi), shape=HISTOGRAM_BINS, delay=True)
+    mean = df.mean(selected_metric, delay=True)
+    count = df.count(selected_metric, delay=True)
+    df.execute()
+    edges = np.linspace(lo, hi, HISTOGRAM_BINS + 1)
+    (median,), = exact_percentiles(df, [(selected_metric, None, float(lo), float(max_value), int(count.get()), [50])])
+
+    stats = {'min': float(lo), 'mean': float(mean.get()), 'median': float(median), 'max': float(max_value)}
+    return pa.table({'left': edges[:-1], 'right': edges[1:], 'count': counts.get().astype('int64')},
+                    metadata={'stats': json.dumps(stats)})
 
+def cached_latency_histogram(selected_date, selected_metric):
+    def compute():
+        return latency_histogram(load_data(selected_date, version), selected_metric)
+    version = data_version(selected_date)
+    if version is None:
+        return compute()
+    return arrow_cache.table(f'{selected_date}.latency', (*source_key(version), selected_metric), compute)
+
+# Histograms and statistics of every latency column for each event type, as
+# one table per day. All the aggregations are delayed and run together, so
+# vaex makes one pass over the frame for the ranges and one for everything
+# else, instead of a filtered pass per type and metric, and a few more for
+# the exact percentiles.
+def insert_update_histograms(df):
+    metrics_present = [metric for metric in latency_columns if metric in df.column_names]
+    groups = [(selected_type, metric) for selected_type in ['I', 'U'] for metric in metrics_present]
+    if len(df) == 0 or not groups:
+        return pa.table({'type': pa.array([], pa.string()), 'metric': pa.array([], pa.string()),
+                         **{name: column for name, column in empty_histogram().to_pydict().items()}})
+
+    selection = {selected_type: df['Insert/Update'] == selected_type for selected_type in ['I', 'U']}
+    ranges = {(t, m): (df.min(m, selection=selection[t], delay=True), df.max(m, selection=selection[t], delay=True),
+                       df.count(m, selection=selection[t], delay=True)) for t, m in groups}
+    df.execute()
+
+    tasks = {}
+    for (t, m), (lo, hi, count) in ranges.items():
+        lo, hi, count = float(lo.get()), float(hi.get()), int(count.get())
+        if count == 0:
+            continue
+        limits = [lo, hi] if hi > lo else [lo - 0.5, hi + 0.5]
+        tasks[t, m] = (lo, hi, count, limits,
+                       df.count(binby=m, limits=histogram_limits(*limits), shape=HISTOGRAM_BINS, selection=selection[t], delay=True),
+                       df.mean(m, selection=selection[t], delay=True))
+    df.execute()
+
+    percentiles = exact_percentiles(df, [(m, selection[t], lo, hi, count, [50, *INSERT_UPDATE_PERCENTILES.values()])
+                                         for (t, m), (lo, hi, count, *_) in tasks.items()])
+
+    columns = {'type': [], 'metric': [], 'left': [], 'right': [], 'count': []}
+    stats = {}
+    for ((t, m), (lo, hi, count, limits, counts, mean)), (median, *tail) in zip(tasks.items(), percentiles):
+        edges = np.linspace(limits[0], limits[1], HISTOGRAM_BINS + 1)
+        columns['type'] += [t] * HISTOGRAM_BINS
+        columns['metric'] += [m] * HISTOGRAM_BINS
+        columns['left'] += edges[:-1].tolist()
+        columns['right'] += edges[1:].tolist()
+        columns['count'] += counts.get().astype('int64').tolist()
+        stats[f'{t}/{m}'] = {'min': lo, 'mean': float(mean.get()), 'median': float(median), 'max': hi, 'count': count,
+                             **{name: float(value) for name, value in zip(INSERT_UPDATE_PERCENTILES, tail)}}
+    return pa.table(columns, metadata={'stats': json.dumps(stats)})
+
+# One type and metric out of the day's cached Insert/Update table, in the
+# shape build_histogram_card takes
+def cached_insert_update_histogram(selected_date, selected_type, selected_metric):
+    version = data_version(selected_date)
+    if version is None:
+        return empty_histogram()
+    table = arrow_cache.table(f'{selected_date}.insert-update', source_key(version),
+                              lambda: insert_update_histograms(load_data(selected_date, version)))
+    stats = (table_metadata(table, 'stats') or {}).get(f'{selected_type}/{selected_metric}')
+    if stats is None:
+        return empty_histogram()
+    mask = pc.and_(pc.equal(table['type'], selected_type), pc.equal(table['metric'], selected_metric))
+    return table.filter(mask).select(['left', 'right', 'count']).replace_schema_metadata({'stats': json.dumps(stats)})
+
+def build_histogram_card(hist, selected_metric, title):
+    stats = table_metadata(hist, 'stats')
+    if stats is None:
+        return html.Div("No data available for the selected filter.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+
+    left, right = hist['left'].to_numpy(), hist['right'].to_numpy()
     fig = go.Figure()
-    fig.add_trace(go.Histogram(x=df_sample[selected_metric].values, name=selected_metric))
+    fig.add_trace(go.Bar(x=(left + right) / 2, y=hist['count'].to_numpy(), width=right - left, name=selected_metric))
     fig.update_layout(
-        title=dict(text=f'{selected_metric} Latency Distribution (Sampled)', font=dict(size=22)),
+        title=dict(text=title, font=dict(size=22)),
         xaxis_title=dict(text='Latency (ns)', font=dict(size=16)),
         yaxis_title=dict(text='Frequency', font=dict(size=16)),
         showlegend=False,
+        bargap=0,
         font=dict(family="Helvetica, Arial, sans-serif", size=14),
         margin=dict(l=50, r=50, t=100, b=50),
         plot_bgcolor='rgba(0,0,0,0)',
@@ -253,63 +538,42 @@ def update_latency_histogram(selected_metric, selected_date):
     )
     fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    
+
     return [
         html.Div([
             dcc.Graph(figure=fig)
         ], className='histogram-plot'),
         html.Div([
             html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
-            html.P(f"Min: {df_sample[selected_metric].min():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Mean: {df_sample[selected_metric].mean():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Median: {df_sample[selected_metric].median():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Max: {df_sample[selected_metric].max():.2f} ns", style={'fontSize': '18px'})
+            html.P(f"Min: {stats['min']:.2f} ns", style={'fontSize': '18px'}),
+            html.P(f"Mean: {stats['mean']:.2f} ns", style={'fontSize': '18px'}),
+            html.P(f"Median: {stats['median']:.2f} ns", style={'fontSize': '18px'}),
+            html.P(f"Max: {stats['max']:.2f} ns", style={'fontSize': '18px'}),
+            *[html.P(f"{name}: {stats[name]:.2f} ns", style={'fontSize': '18px'}) for name in INSERT_UPDATE_PERCENTILES if name in stats],
+            *([html.P(f"Count: {stats['count']:,}", style={'fontSize': '18px'})] if 'count' in stats else []),
         ], className='histogram-stats')
     ]
 
+@app.callback(
+    Output('latency-histogram-card', 'children'),
+    [Input('latency-dropdown', 'value'),
+     Input('date-picker', 'date')]
+)
+@profiling.profiled
+def update_latency_histogram(selected_metric, selected_date):
+    hist = cached_latency_histogram(selected_date, selected_metric)
+    return build_histogram_card(hist, selected_metric, f'{selected_metric} Latency Distribution')
+
 @app.callback(
     Output('insert-update-histogram-card', 'children'),
     [Input('insert-update-dropdown', 'value'),
+     Input('insert-update-metric-dropdown', 'value'),
      Input('date-picker', 'date')]
 )
-@cache.memoize(timeout=TIMEOUT)
-def update_insert_update_histogram(selected_type, selected_date):
-    df = load_data(selected_date)
-    
-    # Sample data for faster processing
-    sample_size = min(100000, df.shape[0])
-    df_sample = df.sample(n=sample_size)
-    
-    filtered_df = df_sample[df_sample['Insert/Update'] == selected_type]
-    selected_metric = 'T5-T4'  # Fixed to T5-T4
-    
-    fig = go.Figure()
-    fig.add_trace(go.Histogram(x=filtered_df[selected_metric].values, name=f'{selected_type} {selected_metric}'))
-    fig.update_layout(
-        title=dict(text=f'{selected_type} {selected_metric} Latency Distribution (Sampled)', font=dict(size=22)),
-        xaxis_title=dict(text='Latency (ns)', font=dict(size=16)),
-        yaxis_title=dict(text='Frequency', font=dict(size=16)),
-        showlegend=False,
-        font=dict(family="Helvetica, Arial, sans-serif", size=14),
-        margin=dict(l=50, r=50, t=100, b=50),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-    )
-    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    
-    return [
-        html.Div([
-            dcc.Graph(figure=fig)
-        ], className='histogram-plot'),
-        html.Div([
-            html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
-            html.P(f"Min: {filtered_df[selected_metric].min():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Mean: {filtered_df[selected_metric].mean():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Median: {filtered_df[selected_metric].median():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Max: {filtered_df[selected_metric].max():.2f} ns", style={'fontSize': '18px'})
-        ], className='histogram-stats')
-    ]
+@profiling.profiled
+def update_insert_update_histogram(selected_type, selected_metric, selected_date):
+    hist = cached_insert_update_histogram(selected_date, selected_type, selected_metric)
+    return build_histogram_card(hist, selected_metric, f'{selected_type} {selected_metric} Latency Distribution')
 
 if __name__ == '__main__':
     app.run_server(debug=True)
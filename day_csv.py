@@ -0,0 +1,58 @@
+import os
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+# Days read straight from their CSV, for the standalone dashboards (last.py,
+# graph.py). Parsed days are kept in a small server-side cache keyed by the
+# file's mtime and size, so toggling views or changing dropdowns never
+# re-reads the CSV unless the file itself changed. Nothing is read until a
+# request asks for a day.
+
+STAGES = ['T1', 'T2', 'T3', 'T4', 'T5']
+LATENCY_COLUMNS = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
+# Latency units, as the factor applied to seconds
+NANOSECONDS = 1e9
+MILLISECONDS = 1e3
+
+
+def data_version(date):
+    filename = f"{date}.csv"
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return filename, stat.st_mtime_ns, stat.st_size
+
+
+def load_data(date, scale=NANOSECONDS):
+    version = data_version(date)
+    if version is None:
+        return pd.DataFrame()  # Return empty DataFrame if file not found
+    return parse_csv(*version, scale)
+
+
+# The day's rows with T1..T5 as datetimes, T2 floored to the second, and the
+# latency between stages in the unit given by scale
+@lru_cache(maxsize=4)
+def parse_csv(filename, mtime_ns, size, scale=NANOSECONDS):
+    df = pd.read_csv(filename)
+    for col in STAGES:
+        df[col] = pd.to_datetime(df[col])
+    df['T2_seconds'] = df['T2'].dt.floor('S')
+    for col in LATENCY_COLUMNS:
+        end, start = col.split('-')
+        df[col] = (df[end] - df[start]).dt.total_seconds() * scale
+    return df
+
+
+# Days with a CSV in the working directory, and the latest of them (today if
+# there are none), listed whenever a page is served
+def available_dates():
+    return [f.split('.')[0] for f in os.listdir() if f.endswith('.csv') and f[0].isdigit()]
+
+
+def latest_date():
+    dates = available_dates()
+    return max(dates) if dates else datetime.now().strftime("%Y-%m-%d")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# A fixed, reproducible sample of one day, built in the same pass that reads
+# the file. Rows are stratified by Insert/Update and by T2 time bucket so quiet
+# periods and the rarer event type are not crowded out, and the slowest events
+# of the day are always kept since a uniform sample would usually miss them.
+
+SAMPLE_SEED = 0
+SAMPLE_PER_STRATUM = 20
+SAMPLE_BUCKET = '5min'
+SLOWEST_METRIC = 'T5-T2'
+TOP_K_SLOWEST = 100
+
+
+class StratifiedSample:
+    def __init__(self, per_stratum=SAMPLE_PER_STRATUM, bucket=SAMPLE_BUCKET, top_k=TOP_K_SLOWEST, seed=SAMPLE_SEED):
+        self.per_stratum = per_stratum
+        self.bucket = bucket
+        self.top_k = top_k
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.sample = None
+        self.slowest = None
+
+    # Every row gets a random key from the seeded generator; keeping the
+    # per_stratum smallest keys of each stratum is a uniform reservoir sample
+    # of it, and merging chunk by chunk gives the same result as one pass
+    # over the whole day.
+    def add(self, chunk):
+        chunk = chunk.assign(
+            _row=np.arange(self.rows, self.rows + len(chunk)),
+            _key=self.rng.random(len(chunk)),
+            _bucket=chunk['T2'].dt.floor(self.bucket),
+        )
+        self.rows += len(chunk)
+
+        candidates = chunk if self.sample is None else pd.concat([self.sample, chunk])
+        strata = [col for col in ('Insert/Update', '_bucket') if col in candidates.columns]
+        self.sample = candidates.sort_values('_key').groupby(strata, dropna=False, sort=False).head(self.per_stratum)
+
+        if SLOWEST_METRIC in chunk.columns:
+            candidates = chunk if self.slowest is None else pd.concat([self.slowest, chunk])
+            self.slowest = candidates.nlargest(self.top_k, SLOWEST_METRIC)
+
+    # The sample plus the slowest events, in file order
+    def result(self):
+        if self.sample is None:
+            return pd.DataFrame()
+        combined = pd.concat([self.sample, self.slowest]) if self.slowest is not None else self.sample
+        combined = combined.drop_duplicates('_row').sort_values('_row')
+        return combined.drop(columns=['_row', '_key', '_bucket']).reset_index(drop=True)
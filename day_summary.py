@@ -0,0 +1,148 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Small per-day summaries (percentiles and histograms per latency metric),
+# written once per file version. Multi-day views only ever read these, so a
+# month of data costs a few JSON reads instead of a month of CSV parsing.
+
+SUMMARY_DIR = '.summaries'
+LATENCY_METRICS = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+PERCENTILES = {'p50': 50, 'p90': 90, 'p99': 99, 'p99.9': 99.9}
+# Shared log-spaced bins from 1 ns to 100 s, 20 per decade, so histograms of
+# different days line up and can be overlaid or added together
+HISTOGRAM_EDGES = np.logspace(0, 11, 11 * 20 + 1)
+
+
+def log_histogram(values):
+    counts, _ = np.histogram(np.clip(values, HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1]), bins=HISTOGRAM_EDGES)
+    return counts
+
+
+# Event count and percentiles of the values of every code in range(size),
+# NaN where a code has no values. Sorting by value and then stably by code
+# puts each group's values in order (about twice as fast as np.lexsort, and
+# faster still when the codes fit in 16 bits, which numpy radix sorts), and
+# every group's percentiles are then interpolated at once the way
+# np.percentile does it.
+def grouped_percentiles(codes, values, size, percentiles):
+    counts = np.bincount(codes, minlength=size)
+    by_value = np.argsort(values)
+    sort_codes = codes[by_value].astype(np.uint16) if size <= 1 << 16 else codes[by_value]
+    ordered = values[by_value[np.argsort(sort_codes, kind='stable')]]
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    last = counts[present] - 1
+    result = np.full((len(percentiles), size), np.nan)
+    for i, percentile in enumerate(percentiles):
+        position = last * percentile / 100
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        low, high = ordered[starts + below], ordered[starts + above]
+        result[i, present] = low + (position - below) * (high - low)
+    return counts, result
+
+
+def summarize_metric(values):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    percentiles = np.percentile(values, list(PERCENTILES.values()))
+    counts = log_histogram(values)
+    return {
+        'count': int(len(values)),
+        'min': float(values.min()),
+        'mean': float(values.mean()),
+        'max': float(values.max()),
+        **{name: float(value) for name, value in zip(PERCENTILES, percentiles)},
+        'histogram': counts.tolist(),
+    }
+
+
+def summarize_frame(df):
+    return {
+        'rows': int(len(df)),
+        'metrics': {
+            metric: summarize_metric(pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype='float64'))
+            for metric in LATENCY_METRICS if metric in df.columns
+        },
+    }
+
+
+def summarize_file(path):
+    df = pd.read_csv(path, usecols=lambda column: column in LATENCY_METRICS)
+    return summarize_frame(df)
+
+
+def summary_path(day, summary_dir=SUMMARY_DIR):
+    return os.path.join(summary_dir, f'{day}.json')
+
+
+# Returns the stored summary for a day, or None if there is none or it was
+# computed from a different version (size/mtime) of the file
+def read_summary(day, entry, summary_dir=SUMMARY_DIR):
+    try:
+        with open(summary_path(day, summary_dir)) as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if summary.get('source') != {'size': entry['size'], 'mtime_ns': entry['mtime_ns']}:
+        return None
+    return summary
+
+
+def write_summary(day, entry, summary, summary_dir=SUMMARY_DIR):
+    os.makedirs(summary_dir, exist_ok=True)
+    summary = {**summary, 'source': {'size': entry['size'], 'mtime_ns': entry['mtime_ns']}}
+    path = summary_path(day, summary_dir)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, path)
+    return summary
+
+
+def _summarize_and_store(day, entry, summary_dir):
+    return write_summary(day, entry, summarize_file(entry['path']), summary_dir)
+
+
+# Summaries for the given days from the catalog. Stored ones are read
+# directly; missing or stale ones are computed in parallel in a process pool.
+# progress(done, total) is called as days complete.
+def load_summaries(catalog, days, progress=None, max_workers=None, summary_dir=SUMMARY_DIR):
+    summaries = {}
+    missing = {}
+    for day in days:
+        entry = catalog.get(day)
+        if entry is None:
+            continue
+        summary = read_summary(day, entry, summary_dir)
+        if summary is None:
+            missing[day] = entry
+        else:
+            summaries[day] = summary
+
+    metrics.inc('dash_cache_requests_total', len(summaries), cache='day_summary', result='hit')
+    metrics.inc('dash_cache_requests_total', len(missing), cache='day_summary', result='miss')
+    total = len(summaries) + len(missing)
+    done = len(summaries)
+    if progress is not None:
+        progress(done, total)
+    if missing:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_summarize_and_store, day, entry, summary_dir): day for day, entry in missing.items()}
+            for future in as_completed(futures):
+                day = futures[future]
+                try:
+                    summaries[day] = future.result()
+                except (OSError, ValueError, pd.errors.ParserError) as e:
+                    print(f"Warning: could not summarize {day}: {e}")
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+    return dict(sorted(summaries.items()))
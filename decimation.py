@@ -0,0 +1,57 @@
+import numpy as np
+
+# Viewport decimation of a scatter of many points sorted by x, so a plot
+# gets about as many points as it has room for rather than one per event.
+# The view is divided into a grid of cells of about a marker's size (y on a
+# log scale) and every occupied cell keeps one of its points, so isolated
+# outliers survive however dense the rest is. The lowest and highest point
+# of every column are always kept too, whichever cells they fall in, so the
+# extremes are exact. Points are sorted by x, which makes the view one
+# binary search away and each column a contiguous slice.
+
+# Cells of about a marker's size in a full-width panel
+WIDTH = 500  # columns
+HEIGHT = 150  # rows
+
+
+# Positions of the points within [x0, x1), of points sorted by x
+def view_slice(x, x0, x1):
+    return slice(np.searchsorted(x, x0, side='left'), np.searchsorted(x, x1, side='left'))
+
+
+# Positions (into x and y) of the points to draw for the view
+# [x0, x1) x [y0, y1] (y bounds in log10 units, None for all), or of every
+# point in it if there are no more than max_points
+def decimate(x, y, x0, x1, y_range=None, width=WIDTH, height=HEIGHT, max_points=None):
+    view = view_slice(x, x0, x1)
+    positions = np.arange(view.start, view.stop)
+    log_y = np.log10(np.maximum(y[view], 1))
+    if y_range is not None:
+        inside = (log_y >= y_range[0]) & (log_y <= y_range[1])
+        positions, log_y = positions[inside], log_y[inside]
+    if len(positions) <= (max_points or width * height // 10):
+        return positions
+
+    xs = x[positions]
+    column = ((xs - x0) * width // max(x1 - x0, 1)).astype(np.int64)
+    column = np.clip(column, 0, width - 1)
+    low, high = (y_range if y_range is not None else (log_y.min(), log_y.max()))
+    row = ((log_y - low) / max(high - low, 1e-12) * height).astype(np.int64)
+    row = np.clip(row, 0, height - 1)
+
+    # One point per occupied cell; with duplicate indices the last
+    # assignment wins, which is as good a representative as any
+    cell = np.full(width * height, -1)
+    cell[column * height + row] = np.arange(len(positions))
+    keep = cell[cell >= 0]
+
+    # Exact extremes per column: columns are contiguous runs since x is
+    # sorted, so the slowest and fastest of each run are found with reduceat
+    starts = np.flatnonzero(np.diff(column, prepend=-1))
+    lengths = np.diff(np.append(starts, len(column)))
+    values = y[positions]
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(values, starts), lengths)
+        hits = np.flatnonzero(values == extreme)
+        keep = np.concatenate([keep, hits[np.unique(column[hits], return_index=True)[1]]])
+    return positions[np.unique(keep)]
@@ -4,82 +4,109 @@ from dash.dependencies import Input, Output, State
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
-from datetime import datetime, timedelta
-import os
+from functools import lru_cache
+import day_csv
 
 # Initialize the Dash app
 app = dash.Dash(__name__, external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'])
 
-# Function to load data based on selected date
-def load_data(date):
-    filename = f"{date}.csv"
-    try:
-        df = pd.read_csv(filename)
-        df['T2'] = pd.to_datetime(df['T2'])
-        df['T2_seconds'] = df['T2'].dt.floor('S')
-        
-        # Calculate latency columns
-        for col in ['T1', 'T2', 'T3', 'T4', 'T5']:
-            df[col] = pd.to_datetime(df[col])
-        df['T5-T4'] = (df['T5'] - df['T4']).dt.total_seconds() * 1000  # Convert to milliseconds
-        df['T4-T3'] = (df['T4'] - df['T3']).dt.total_seconds() * 1000
-        df['T3-T2'] = (df['T3'] - df['T2']).dt.total_seconds() * 1000
-        df['T2-T1'] = (df['T2'] - df['T1']).dt.total_seconds() * 1000
-        df['T5-T2'] = (df['T5'] - df['T2']).dt.total_seconds() * 1000
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()  # Return empty DataFrame if file not found
-
-# Get list of available dates from CSV files
-available_dates = [f.split('.')[0] for f in os.listdir() if f.endswith('.csv') and f[0].isdigit()]
-initial_date = max(available_dates) if available_dates else datetime.now().strftime("%Y-%m-%d")
-
-# Initial data load
-df = load_data(initial_date)
-
-# Define the layout
-app.layout = html.Div([
-    html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
-    
-    html.Div([
-        dcc.DatePickerSingle(
-            id='date-picker',
-            date=initial_date,
-            display_format='YYYY-MM-DD',
-            style={'margin': '10px'}
-        ),
-        dcc.Dropdown(
-            id='timestamp-dropdown',
-            options=[],
-            placeholder="Select a specific timestamp",
-            style={'width': '300px', 'margin': '10px'}
-        ),
-        html.Button('Toggle View', id='toggle-view', n_clicks=0, 
-                    style={'margin': '10px', 'padding': '10px', 'backgroundColor': '#3498db', 'color': 'white', 'border': 'none', 'borderRadius': '5px', 'cursor': 'pointer', 'transition': 'background-color 0.3s'}),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
-
-    html.Div(id='content-container')
-], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+# Latencies are shown in milliseconds
+LATENCY_SCALE = day_csv.MILLISECONDS
 
-@app.callback(
-    [Output('timestamp-dropdown', 'options'),
-     Output('content-container', 'children')],
-    [Input('date-picker', 'date'),
-     Input('timestamp-dropdown', 'value'),
-     Input('toggle-view', 'n_clicks')]
-)
-def update_dashboard(selected_date, selected_timestamp, n_clicks):
-    df = load_data(selected_date)
-    
-    if df.empty:
-        return [], html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+@lru_cache(maxsize=4)
+def timestamp_options(filename, mtime_ns, size):
+    df = day_csv.parse_csv(filename, mtime_ns, size, LATENCY_SCALE)
+    return [{'label': ts, 'value': ts} for ts in df['T2_seconds'].dt.strftime('%H:%M:%S').unique()]
 
-    timestamp_options = [{'label': ts, 'value': ts} for ts in df['T2_seconds'].dt.strftime('%H:%M:%S').unique()]
+# Define the layout. It is served per page load, so the latest day is
+# picked when a page is opened and nothing is read at import time.
+def serve_layout():
+    return html.Div([
+        html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
     
-    if selected_timestamp:
-        df = df[df['T2_seconds'].dt.strftime('%H:%M:%S') == selected_timestamp]
-
+        html.Div([
+            dcc.DatePickerSingle(
+                id='date-picker',
+                date=day_csv.latest_date(),
+                display_format='YYYY-MM-DD',
+                style={'margin': '10px'}
+            ),
+            dcc.Dropdown(
+                id='timestamp-dropdown',
+                options=[],
+                placeholder="Select a specific timestamp",
+                style={'width': '300px', 'margin': '10px'}
+            ),
+            html.Button('Toggle View', id='toggle-view', n_clicks=0, 
+                        style={'margin': '10px', 'padding': '10px', 'backgroundColor': '#3498db', 'color': 'white', 'border': 'none', 'borderRadius': '5px', 'cursor': 'pointer', 'transition': 'background-color 0.3s'}),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+
+        html.Div(id='content-container')
+    ], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+
+app.layout = serve_layout
+
+# Table view: just the two tables, no figures are built for it.
+def build_table_view(df):
+    return [
+        html.Div([
+            html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center'}),
+            dash_table.DataTable(
+                id='table1',
+                columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']],
+                data=df.to_dict('records'),
+                style_table={'height': '300px', 'overflowY': 'auto'},
+                page_size=10,
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '10px',
+                    'font-family': 'Helvetica, Arial, sans-serif'
+                },
+                style_header={
+                    'backgroundColor': '#3498db',
+                    'color': 'white',
+                    'fontWeight': 'bold'
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': '#f2f2f2'
+                    }
+                ]
+            )
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+            
+        html.Div([
+            html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center'}),
+            dash_table.DataTable(
+                id='table2',
+                columns=[{"name": i, "id": i} for i in ['T1', 'T2', 'T3', 'T4', 'T5', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']],
+                data=df.to_dict('records'),
+                style_table={'height': '300px', 'overflowY': 'auto'},
+                page_size=10,
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '10px',
+                    'font-family': 'Helvetica, Arial, sans-serif'
+                },
+                style_header={
+                    'backgroundColor': '#e74c3c',
+                    'color': 'white',
+                    'fontWeight': 'bold'
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': '#f2f2f2'
+                    }
+                ]
+            )
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
+    ]
+
+# Analysis view: the T2 chart and the five latency histograms are only built
+# when this view is actually shown.
+def build_analysis_view(df):
     t2_counts = df['T2_seconds'].value_counts().sort_index()
     t2_df = pd.DataFrame({'Timestamp': t2_counts.index.strftime('%H:%M:%S'), 'Count': t2_counts.values})
 
@@ -125,73 +152,39 @@ def update_dashboard(selected_date, selected_timestamp, n_clicks):
         fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
         latency_hists.append(dcc.Graph(figure=fig, style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}))
 
-    if n_clicks % 2 == 0:
-        return timestamp_options, [
+    return html.Div([
+        html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center'}),
+        html.Div([
             html.Div([
-                html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center'}),
-                dash_table.DataTable(
-                    id='table1',
-                    columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']],
-                    data=df.to_dict('records'),
-                    style_table={'height': '300px', 'overflowY': 'auto'},
-                    page_size=10,
-                    style_cell={
-                        'textAlign': 'left',
-                        'padding': '10px',
-                        'font-family': 'Helvetica, Arial, sans-serif'
-                    },
-                    style_header={
-                        'backgroundColor': '#3498db',
-                        'color': 'white',
-                        'fontWeight': 'bold'
-                    },
-                    style_data_conditional=[
-                        {
-                            'if': {'row_index': 'odd'},
-                            'backgroundColor': '#f2f2f2'
-                        }
-                    ]
-                )
+                html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center'}),
+                dcc.Graph(figure=t2_hist)
             ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-            
-            html.Div([
-                html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center'}),
-                dash_table.DataTable(
-                    id='table2',
-                    columns=[{"name": i, "id": i} for i in ['T1', 'T2', 'T3', 'T4', 'T5', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']],
-                    data=df.to_dict('records'),
-                    style_table={'height': '300px', 'overflowY': 'auto'},
-                    page_size=10,
-                    style_cell={
-                        'textAlign': 'left',
-                        'padding': '10px',
-                        'font-family': 'Helvetica, Arial, sans-serif'
-                    },
-                    style_header={
-                        'backgroundColor': '#e74c3c',
-                        'color': 'white',
-                        'fontWeight': 'bold'
-                    },
-                    style_data_conditional=[
-                        {
-                            'if': {'row_index': 'odd'},
-                            'backgroundColor': '#f2f2f2'
-                        }
-                    ]
-                )
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        ]
-    else:
-        return timestamp_options, html.Div([
-            html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center'}),
-            html.Div([
-                html.Div([
-                    html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center'}),
-                    dcc.Graph(figure=t2_hist)
-                ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-                html.Div(latency_hists, style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around'})
-            ])
+            html.Div(latency_hists, style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around'})
         ])
+    ])
+
+@app.callback(
+    [Output('timestamp-dropdown', 'options'),
+     Output('content-container', 'children')],
+    [Input('date-picker', 'date'),
+     Input('timestamp-dropdown', 'value'),
+     Input('toggle-view', 'n_clicks')]
+)
+def update_dashboard(selected_date, selected_timestamp, n_clicks):
+    version = day_csv.data_version(selected_date)
+    
+    if version is None:
+        return [], html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+
+    df = day_csv.parse_csv(*version, LATENCY_SCALE)
+    
+    if selected_timestamp:
+        df = df[df['T2_seconds'].dt.strftime('%H:%M:%S') == selected_timestamp]
+
+    # Only the visible view is computed; the hidden one is never built.
+    if n_clicks % 2 == 0:
+        return timestamp_options(*version), build_table_view(df)
+    return timestamp_options(*version), build_analysis_view(df)
 
 # Run the app
 if __name__ == '__main__':
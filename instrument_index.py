@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from day_summary import grouped_percentiles
+
+# Per-day index of the events of every instrument. The columns the drill-down
+# shows are stored once, in file order. For each id column the index holds
+# the sorted distinct ids and CSR-style offsets into a row order that lists
+# each id's rows contiguously (in file order within an id), so looking up an
+# instrument is a binary search and a take() of its rows from the
+# memory-mapped events, however big the day is.
+
+INDEX_COLUMNS = ['OptionEMMId', 'UnderlyingEMMId']
+LATENCY_COLUMNS = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+EVENT_COLUMNS = [*INDEX_COLUMNS, 'T2', *LATENCY_COLUMNS, 'Insert/Update']
+CHUNK_ROWS = 100_000
+# Rows with no (or an unparseable) id are indexed under this id
+MISSING_ID = -1
+
+
+# Sorted distinct ids, offsets[i]:offsets[i + 1] being the slice of order
+# that holds the rows of ids[i]
+def build_csr(values):
+    order = np.argsort(values, kind='stable')
+    ids, starts = np.unique(values[order], return_index=True)
+    return ids, np.append(starts, len(values)), order
+
+
+def read_events(filename, progress=None, chunksize=CHUNK_ROWS):
+    tables = []
+    with open(filename, 'rb') as f:
+        total = f.seek(0, 2)
+        f.seek(0)
+        for chunk in pd.read_csv(f, chunksize=chunksize, usecols=lambda col: col in EVENT_COLUMNS):
+            columns = {}
+            for col in INDEX_COLUMNS:
+                if col in chunk.columns:
+                    columns[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(MISSING_ID).to_numpy(dtype='int64')
+            columns['T2'] = pd.to_datetime(chunk['T2']).to_numpy()
+            for col in LATENCY_COLUMNS:
+                if col in chunk.columns:
+                    columns[col] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype='float64')
+            if 'Insert/Update' in chunk.columns:
+                columns['Insert/Update'] = pa.array(chunk['Insert/Update'], type=pa.string(), from_pandas=True)
+            tables.append(pa.table(columns))
+            if progress is not None:
+                progress(f.tell(), total)
+    if not tables:
+        return pa.table({col: pa.array([], pa.int64()) for col in INDEX_COLUMNS})
+    return pa.concat_tables(tables).combine_chunks()
+
+
+class InstrumentIndex:
+    def __init__(self, events, csr):
+        self.events = events
+        self.csr = csr
+
+    @classmethod
+    def build(cls, filename, progress=None):
+        events = read_events(filename, progress)
+        csr = {col: build_csr(events[col].to_numpy()) for col in INDEX_COLUMNS if col in events.column_names}
+        return cls(events, csr)
+
+    # Stored as ArrowCache entries under name and key: the events, and per id
+    # column its ids with their offsets and its row order
+    @staticmethod
+    def paths(cache, name, key):
+        return {
+            'events': cache.path(f'{name}.events', *key),
+            **{f'{col}-ids': cache.path(f'{name}.{col}-ids', *key) for col in INDEX_COLUMNS},
+            **{f'{col}-rows': cache.path(f'{name}.{col}-rows', *key) for col in INDEX_COLUMNS},
+        }
+
+    def write(self, cache, name, key):
+        paths = self.paths(cache, name, key)
+        for col, (ids, offsets, order) in self.csr.items():
+            cache.write_table(pa.table({'id': ids, 'start': offsets[:-1], 'stop': offsets[1:]}), paths[f'{col}-ids'])
+            cache.write_table(pa.table({'row': order}), paths[f'{col}-rows'])
+        # The events go last: their presence marks the index as complete
+        cache.write_table(self.events, paths['events'])
+        cache.evict(keep=tuple(paths.values()))
+
+    # The stored index (memory-mapped), or None if any part of it is missing
+    @classmethod
+    def read(cls, cache, name, key):
+        paths = cls.paths(cache, name, key)
+        if not all(cache.touch(path) for path in paths.values()):
+            return None
+        try:
+            csr = {}
+            for col in INDEX_COLUMNS:
+                ids = cache.read_table(paths[f'{col}-ids'])
+                stop = ids['stop'].to_numpy()
+                offsets = np.append(ids['start'].to_numpy(), stop[-1] if len(stop) else 0)
+                csr[col] = (ids['id'].to_numpy(), offsets, cache.read_table(paths[f'{col}-rows'])['row'].to_numpy())
+            return cls(cache.read_table(paths['events']), csr)
+        except (OSError, KeyError, pa.ArrowInvalid):
+            return None
+
+    # Distinct ids of a column and how many events each has
+    def instruments(self, column):
+        ids, offsets, _ = self.csr[column]
+        return ids, np.diff(offsets)
+
+    # The position of each row's id among the sorted ids, i.e. its categorical
+    # code, recovered from the row order
+    def codes(self, column):
+        ids, offsets, order = self.csr[column]
+        codes = np.empty(len(order), dtype=np.int64)
+        codes[order] = np.repeat(np.arange(len(ids)), np.diff(offsets))
+        return codes
+
+    # Event count, mean and percentile of a latency column for every id with
+    # events among the masked rows
+    def group_stats(self, column, metric, mask=None, percentile=99):
+        ids = self.csr[column][0]
+        codes = self.codes(column)
+        values = self.events[metric].to_numpy()
+        keep = ~np.isnan(values) if mask is None else mask & ~np.isnan(values)
+        codes, values = codes[keep], values[keep]
+
+        counts, (percentiles,) = grouped_percentiles(codes, values, len(ids), [percentile])
+        sums = np.bincount(codes, weights=values, minlength=len(ids))
+        present = counts > 0
+        return pd.DataFrame({
+            'id': ids[present],
+            'events': counts[present],
+            'mean': sums[present] / counts[present],
+            f'p{percentile}': percentiles[present],
+        })
+
+    # Percentile of a latency column per time bucket for the top_k ids by
+    # event count. Each row gets a cell code (bucket * top_k + rank of its
+    # id), so the whole grid is one grouped_percentiles over integer codes.
+    # Returns the ids, the start of every bucket, and the event counts and
+    # percentiles as (id, bucket) arrays.
+    def time_grid(self, column, metric, bucket, top_k, percentile=99):
+        ids, offsets, _ = self.csr[column]
+        top = np.argsort(-np.diff(offsets), kind='stable')[:top_k]
+        rank = np.full(len(ids), -1)
+        rank[top] = np.arange(len(top))
+        row_rank = rank[self.codes(column)]
+        values = self.events[metric].to_numpy()
+        keep = (row_rank >= 0) & ~np.isnan(values)
+        if not keep.any():
+            return ids[top], np.array([], dtype='datetime64[ns]'), np.zeros((len(top), 0), np.int64), np.zeros((len(top), 0))
+
+        step = pd.Timedelta(bucket).value
+        buckets = self.events['T2'].to_numpy()[keep].view(np.int64) // step
+        first = buckets.min()
+        buckets -= first
+        n_buckets = int(buckets.max()) + 1
+        counts, (percentiles,) = grouped_percentiles(buckets * len(top) + row_rank[keep], values[keep], n_buckets * len(top), [percentile])
+        starts = ((first + np.arange(n_buckets)) * step).astype('datetime64[ns]')
+        return ids[top], starts, counts.reshape(n_buckets, len(top)).T, percentiles.reshape(n_buckets, len(top)).T
+
+    def rows(self, column, instrument):
+        ids, offsets, order = self.csr[column]
+        i = np.searchsorted(ids, instrument)
+        if i == len(ids) or ids[i] != instrument:
+            return order[:0]
+        return order[offsets[i]:offsets[i + 1]]
+
+    # The instrument's events in file order
+    def lookup(self, column, instrument):
+        return self.events.take(pa.array(self.rows(column, instrument))).to_pandas()
@@ -4,8 +4,9 @@ from dash.dependencies import Input, Output, State
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
-from datetime import datetime
-import os
+import math
+from functools import lru_cache
+import day_csv
 
 # Initialize the Dash app
 app = dash.Dash(__name__)
@@ -83,62 +84,54 @@ app.index_string = '''
 </html>
 '''
 
-# Function to load data based on selected date
-def load_data(date):
-    filename = f"{date}.csv"
-    try:
-        df = pd.read_csv(filename)
-        df['T2'] = pd.to_datetime(df['T2'])
-        df['T2_seconds'] = df['T2'].dt.floor('S')
-        
-        # Calculate latency columns in nanoseconds
-        for col in ['T1', 'T2', 'T3', 'T4', 'T5']:
-            df[col] = pd.to_datetime(df[col])
-        df['T5-T4'] = (df['T5'] - df['T4']).dt.total_seconds() * 1e9  # Convert to nanoseconds
-        df['T4-T3'] = (df['T4'] - df['T3']).dt.total_seconds() * 1e9
-        df['T3-T2'] = (df['T3'] - df['T2']).dt.total_seconds() * 1e9
-        df['T2-T1'] = (df['T2'] - df['T1']).dt.total_seconds() * 1e9
-        df['T5-T2'] = (df['T5'] - df['T2']).dt.total_seconds() * 1e9
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()  # Return empty DataFrame if file not found
+# Latencies are shown in nanoseconds
+LATENCY_SCALE = day_csv.NANOSECONDS
 
-# Get list of available dates from CSV files
-available_dates = [f.split('.')[0] for f in os.listdir() if f.endswith('.csv') and f[0].isdigit()]
-initial_date = max(available_dates) if available_dates else datetime.now().strftime("%Y-%m-%d")
+# Define the layout. It is served per page load, so the latest day is
+# picked when a page is opened and nothing is read at import time.
+def serve_layout():
+    return html.Div([
+        html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
+    
+        html.Div([
+            dcc.DatePickerSingle(
+                id='date-picker',
+                date=day_csv.latest_date(),
+                display_format='YYYY-MM-DD',
+                style={'margin': '10px'}
+            ),
+            html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
 
-# Initial data load
-df = load_data(initial_date)
+        # Both views live in the page at once; the toggle only flips their
+        # visibility on the client. Each view is rendered by the server the first
+        # time it is shown for a date, tracked through the *-view-date stores.
+        html.Div([
+            html.Div(id='table-view'),
+            html.Div(id='analysis-view', style={'display': 'none'})
+        ], id='content-container'),
+        dcc.Store(id='table-view-request'),
+        dcc.Store(id='analysis-view-request'),
+        dcc.Store(id='table-view-date'),
+        dcc.Store(id='analysis-view-date')
+    ], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
 
-# Define the layout
-app.layout = html.Div([
-    html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
-    
-    html.Div([
-        dcc.DatePickerSingle(
-            id='date-picker',
-            date=initial_date,
-            display_format='YYYY-MM-DD',
-            style={'margin': '10px'}
-        ),
-        html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+app.layout = serve_layout
 
-    html.Div(id='content-container')
-], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+latency_metrics = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
 
-@app.callback(
-    Output('content-container', 'children'),
-    [Input('date-picker', 'date'),
-     Input('toggle-view', 'n_clicks')]
-)
-def update_dashboard(selected_date, n_clicks):
-    df = load_data(selected_date)
-    
-    if df.empty:
-        return html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+TABLE_PAGE_SIZE = 5
+TABLE1_COLUMNS = ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']
+TABLE2_COLUMNS = ['T1', 'T2', 'T3', 'T4', 'T5', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+
+def no_data_message():
+    return html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
 
+# The T2 bar chart depends only on the file contents, so it is built once per
+# file version and reused every time the analysis view is shown.
+@lru_cache(maxsize=4)
+def build_t2_histogram(filename, mtime_ns, size):
+    df = day_csv.parse_csv(filename, mtime_ns, size, LATENCY_SCALE)
     t2_counts = df['T2_seconds'].value_counts().sort_index()
     t2_df = pd.DataFrame({'Timestamp': t2_counts.index.strftime('%H:%M:%S'), 'Count': t2_counts.values})
 
@@ -160,92 +153,179 @@ def update_dashboard(selected_date, n_clicks):
     t2_hist.update_traces(marker_line_color='rgb(8,48,107)', marker_line_width=1.5)
     t2_hist.update_xaxes(tickangle=45, tickmode='array', tickvals=t2_df['Timestamp'])
 
-    latency_metrics = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
+    return t2_hist
 
-    if n_clicks % 2 == 0:
-        return [
+# Table view: only the row count is needed up front, the rows themselves are
+# served page by page from the cached frame by the paging callbacks below.
+def build_table_view(selected_date):
+    df = day_csv.load_data(selected_date, LATENCY_SCALE)
+
+    if df.empty:
+        return no_data_message()
+
+    page_count = max(1, math.ceil(len(df) / TABLE_PAGE_SIZE))
+    return [
+        html.Div([
+            html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
             html.Div([
-                html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
-                html.Div([
-                    dash_table.DataTable(
-                        id='table1',
-                        columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']],
-                        data=df.to_dict('records'),
-                        page_size=5,
-                        style_cell={
-                            'textAlign': 'left',
-                            'padding': '10px',
-                            'font-family': 'Helvetica, Arial, sans-serif'
-                        },
-                        style_header={
-                            'backgroundColor': '#3498db',
-                            'color': 'white',
-                            'fontWeight': 'bold'
-                        },
-                        style_data_conditional=[
-                            {
-                                'if': {'row_index': 'odd'},
-                                'backgroundColor': '#f2f2f2'
-                            }
-                        ]
-                    )
-                ], className='table-container')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+                dash_table.DataTable(
+                    id='table1',
+                    columns=[{"name": i, "id": i} for i in TABLE1_COLUMNS],
+                    page_current=0,
+                    page_size=TABLE_PAGE_SIZE,
+                    page_action='custom',
+                    page_count=page_count,
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#3498db',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], className='table-container')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
             
+        html.Div([
+            html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
             html.Div([
-                html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
-                html.Div([
-                    dash_table.DataTable(
-                        id='table2',
-                        columns=[{"name": i, "id": i} for i in ['T1', 'T2', 'T3', 'T4', 'T5', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']],
-                        data=df.to_dict('records'),
-                        page_size=5,
-                        style_cell={
-                            'textAlign': 'left',
-                            'padding': '10px',
-                            'font-family': 'Helvetica, Arial, sans-serif'
-                        },
-                        style_header={
-                            'backgroundColor': '#e74c3c',
-                            'color': 'white',
-                            'fontWeight': 'bold'
-                        },
-                        style_data_conditional=[
-                            {
-                                'if': {'row_index': 'odd'},
-                                'backgroundColor': '#f2f2f2'
-                            }
-                        ]
-                    )
-                ], className='table-container')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        ]
-    else:
-        return html.Div([
-            html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '28px'}),
-            html.Div([
-                html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-                dcc.Graph(figure=t2_hist)
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-            html.Div([
-                html.H3("Latency Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-                dcc.Dropdown(
-                    id='latency-dropdown',
-                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
-                    value=latency_metrics[0],
-                    style={'width': '50%', 'margin': '10px auto'}
-                ),
-                html.Div(id='latency-histogram-card', className='histogram-card')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        ])
+                dash_table.DataTable(
+                    id='table2',
+                    columns=[{"name": i, "id": i} for i in TABLE2_COLUMNS],
+                    page_current=0,
+                    page_size=TABLE_PAGE_SIZE,
+                    page_action='custom',
+                    page_count=page_count,
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#e74c3c',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], className='table-container')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
+    ]
+
+# Analysis view: the latency card is filled by its own callback, so this only
+# needs the (cached) T2 chart.
+def build_analysis_view(selected_date):
+    version = day_csv.data_version(selected_date)
+
+    if version is None:
+        return no_data_message()
+
+    return html.Div([
+        html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '28px'}),
+        html.Div([
+            html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            dcc.Graph(figure=build_t2_histogram(*version))
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Latency Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            dcc.Dropdown(
+                id='latency-dropdown',
+                options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                value=latency_metrics[0],
+                style={'width': '50%', 'margin': '10px auto'}
+            ),
+            html.Div(id='latency-histogram-card', className='histogram-card')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
+    ])
+
+app.clientside_callback(
+    """
+    function(n_clicks, selectedDate, tableDate, analysisDate) {
+        const showTable = n_clicks % 2 === 0;
+        const noUpdate = window.dash_clientside.no_update;
+        return [
+            {'display': showTable ? 'block' : 'none'},
+            {'display': showTable ? 'none' : 'block'},
+            showTable && tableDate !== selectedDate ? selectedDate : noUpdate,
+            !showTable && analysisDate !== selectedDate ? selectedDate : noUpdate
+        ];
+    }
+    """,
+    [Output('table-view', 'style'),
+     Output('analysis-view', 'style'),
+     Output('table-view-request', 'data'),
+     Output('analysis-view-request', 'data')],
+    [Input('toggle-view', 'n_clicks'),
+     Input('date-picker', 'date')],
+    [State('table-view-date', 'data'),
+     State('analysis-view-date', 'data')]
+)
+
+@app.callback(
+    [Output('table-view', 'children'),
+     Output('table-view-date', 'data')],
+    Input('table-view-request', 'data'),
+    prevent_initial_call=True
+)
+def update_table_view(selected_date):
+    return build_table_view(selected_date), selected_date
+
+@app.callback(
+    [Output('analysis-view', 'children'),
+     Output('analysis-view-date', 'data')],
+    Input('analysis-view-request', 'data'),
+    prevent_initial_call=True
+)
+def update_analysis_view(selected_date):
+    return build_analysis_view(selected_date), selected_date
+
+def page_records(selected_date, columns, page_current, page_size):
+    df = day_csv.load_data(selected_date, LATENCY_SCALE)
+    if df.empty:
+        return []
+    start = page_current * page_size
+    return df.iloc[start:start + page_size][columns].to_dict('records')
+
+@app.callback(
+    Output('table1', 'data'),
+    [Input('table1', 'page_current'),
+     Input('table1', 'page_size')],
+    State('table-view-date', 'data')
+)
+def update_table1_page(page_current, page_size, selected_date):
+    return page_records(selected_date, TABLE1_COLUMNS, page_current, page_size)
+
+@app.callback(
+    Output('table2', 'data'),
+    [Input('table2', 'page_current'),
+     Input('table2', 'page_size')],
+    State('table-view-date', 'data')
+)
+def update_table2_page(page_current, page_size, selected_date):
+    return page_records(selected_date, TABLE2_COLUMNS, page_current, page_size)
+
 
 @app.callback(
     Output('latency-histogram-card', 'children'),
     [Input('latency-dropdown', 'value'),
-     Input('date-picker', 'date')]
+     Input('analysis-view-date', 'data')]
 )
 def update_latency_histogram(selected_metric, selected_date):
-    df = load_data(selected_date)
+    df = day_csv.load_data(selected_date, LATENCY_SCALE)
     
     fig = go.Figure()
     fig.add_trace(go.Histogram(x=df[selected_metric], name=selected_metric))
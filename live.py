@@ -0,0 +1,60 @@
+import io
+import os
+
+import pandas as pd
+
+# Incremental reading of a CSV that is still being appended to. Each poll
+# reads only the bytes written since the previous one (up to a cap), so the
+# cost of a poll depends on the arrival rate, not on how big the file is.
+
+LIVE_BACKFILL_BYTES = 8 * 1024 * 1024
+LIVE_MAX_BYTES = 2 * 1024 * 1024
+# Bytes just before the read offset that are remembered to tell whether the
+# file is still the one being read
+MARK_BYTES = 64
+
+
+# What identifies the file read up to offset: its inode and the bytes right
+# before offset (hex, so the mark can be kept in JSON state). A rotated file
+# has another inode; one rewritten in place almost surely has other bytes
+# there.
+def file_mark(f, offset):
+    start = max(offset - MARK_BYTES, 0)
+    f.seek(start)
+    return {'inode': os.fstat(f.fileno()).st_ino, 'tail': f.read(offset - start).hex()}
+
+
+# Header of the file, the offset of the first complete row at most
+# backfill_bytes before the current end, where a live view starts reading,
+# whether earlier rows are left out, and the file's mark at that offset.
+def tail_start(path, backfill_bytes=LIVE_BACKFILL_BYTES):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        header = f.readline()
+        start = len(header)
+        if size - backfill_bytes > start:
+            # Land inside a row, then skip to the start of the next one
+            f.seek(size - backfill_bytes - 1)
+            f.readline()
+            start = f.tell()
+        mark = file_mark(f, start)
+    return header.decode().strip().split(','), start, start > len(header), mark
+
+
+# Rows appended since offset, the offset to continue from and the file's mark
+# there. A trailing partial row is left for the next poll. Returns None as
+# the offset when the file is no longer the one marked: another inode, shorter
+# than offset, or other bytes before offset. It was replaced and must be
+# re-tailed.
+def read_appended(path, header, offset, mark, max_bytes=LIVE_MAX_BYTES):
+    empty = pd.DataFrame(columns=header)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < offset or file_mark(f, offset) != mark:
+            return empty, None, mark
+        data = f.read(max_bytes)
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return empty, offset, mark
+        mark = file_mark(f, offset + end)
+    rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=header)
+    return rows, offset + end, mark
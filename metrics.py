@@ -0,0 +1,181 @@
+import functools
+import os
+import threading
+import time
+
+import diskcache
+import flask
+
+# Minimal Prometheus metrics for the dashboards. Observations are plain dict
+# updates in the process that makes them; every FLUSH_INTERVAL seconds (and
+# when a background job finishes) the accumulated deltas are added to a
+# diskcache shared by all processes, so /metrics reports the sum over every
+# gunicorn worker and background-callback job, not just the one serving it.
+
+METRICS_DIR = './metrics-cache'
+FLUSH_INTERVAL = 1.0  # seconds
+# Sums are stored as integers in millionths so they can be added atomically
+SUM_SCALE = 1_000_000
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+HISTOGRAMS = {
+    'dash_callback_duration_seconds': ('Time to run a callback request, including JSON serialization.', DURATION_BUCKETS),
+    'dash_response_size_bytes': ('Size of callback response payloads.', SIZE_BUCKETS),
+    'dash_load_data_duration_seconds': ('Time to load one day of data.', DURATION_BUCKETS),
+}
+COUNTERS = {
+    'dash_load_data_rows_total': 'Rows loaded by load_data.',
+    'dash_cache_requests_total': 'Cache lookups by cache and result (hit or miss).',
+}
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = time.monotonic()
+_store = None
+_pid = os.getpid()
+
+
+# A forked background job starts with a copy of its parent's unflushed
+# deltas, which the parent will flush itself, and must not reuse its
+# database connection
+def _check_fork():
+    global _pid, _store
+    if os.getpid() != _pid:
+        _pid = os.getpid()
+        _store = None
+        _pending.clear()
+
+
+def _shared_store():
+    global _store
+    if _store is None:
+        _store = diskcache.Cache(METRICS_DIR)
+    return _store
+
+
+def _add(key, amount):
+    _check_fork()
+    with _lock:
+        _pending[key] = _pending.get(key, 0) + amount
+
+
+def inc(name, amount=1, **labels):
+    _add((name, tuple(sorted(labels.items())), ''), int(amount))
+    maybe_flush()
+
+
+def observe(name, value, **labels):
+    _check_fork()
+    labels = tuple(sorted(labels.items()))
+    buckets = HISTOGRAMS[name][1]
+    with _lock:
+        for bound in buckets:
+            if value <= bound:
+                key = (name, labels, bound)
+                _pending[key] = _pending.get(key, 0) + 1
+        for suffix, amount in (('+Inf', 1), ('sum', int(value * SUM_SCALE))):
+            key = (name, labels, suffix)
+            _pending[key] = _pending.get(key, 0) + amount
+    maybe_flush()
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def flush():
+    global _last_flush
+    _check_fork()
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    store = _shared_store()
+    with store.transact():
+        for key, amount in pending.items():
+            store.incr(key, amount)
+
+
+# For functions that run in a short-lived process, such as background
+# callbacks: whatever they recorded is flushed before they return
+def flush_after(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            flush()
+    return wrapper
+
+
+# Label values may hold callback ids and exception text; the text format
+# requires backslash, double quote and newline to be escaped in them
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + '}'
+
+
+def render():
+    flush()
+    store = _shared_store()
+    values = {key: store[key] for key in store.iterkeys()}
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (metric, labels, _), value in sorted(values.items(), key=str):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels in sorted({labels for metric, labels, _ in values if metric == name}):
+            for bound in buckets:
+                lines.append(f'{name}_bucket{_format_labels(labels, le=f"{bound:g}")} {values.get((name, labels, bound), 0)}')
+            count = values.get((name, labels, '+Inf'), 0)
+            lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {values.get((name, labels, "sum"), 0) / SUM_SCALE}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+# Times every Dash callback request, labelled by the callback function's name,
+# records its response size, and serves everything on /metrics
+def init_app(app):
+    server = app.server
+    names = {}
+
+    def callback_name(output):
+        if output not in names:
+            callback = app.callback_map.get(output, {}).get('callback')
+            names[output] = getattr(callback, '__name__', output)
+        return names[output]
+
+    @server.before_request
+    def start_timer():
+        if flask.request.path.endswith('/_dash-update-component'):
+            flask.g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def record_request(response):
+        start = flask.g.pop('metrics_start', None)
+        if start is not None:
+            body = flask.request.get_json(silent=True) or {}
+            name = callback_name(body.get('output', 'unknown'))
+            observe('dash_callback_duration_seconds', time.perf_counter() - start, callback=name)
+            if response.content_length is not None:
+                observe('dash_response_size_bytes', response.content_length, callback=name)
+        return response
+
+    @server.route('/metrics')
+    def metrics_endpoint():
+        return flask.Response(render(), mimetype='text/plain; version=0.0.4')
@@ -1,14 +1,68 @@
 import dash
 from dash import dcc, html, dash_table
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
+from plotly.io.json import to_json_plotly
+import flask
 from datetime import datetime
 import os
+import sys
+import math
+import errno
+import time
+import fcntl
+import hashlib
+import shutil
+import tempfile
+import orjson
+from functools import lru_cache
+import numpy as np
+import diskcache
+import pyarrow as pa
+from dash import DiskcacheManager, Patch, ctx, no_update
+from arrow_cache import ArrowCache, table_metadata
+from catalog import Catalog
+from instrument_index import InstrumentIndex
+import anomalies
+import day_summary
+import decimation
+import live
+import metrics
+import profiling
+import throughput
+
+# Loading and aggregating a day runs in background callbacks so a big date
+# never ties up a Flask worker; jobs and their progress go through diskcache.
+background_callback_manager = DiskcacheManager(diskcache.Cache('./callback-cache'))
+
+# Serialized figures of the analysis view (the T2 chart and the latency cards)
+# per date, part and file version. A day's figures never change once
+# computed, so repeat views are served as stored bytes with no figure building
+# or JSON encoding.
+figure_cache = diskcache.Cache('./figure-cache', size_limit=256 * 1024 * 1024)
+# Closed days are baked into snapshot bundles: every figure part plus the
+# table's row index, written once and served with ETag and immutable caching.
+SNAPSHOT_DIR = '.snapshots'
+
+CSV_CHUNK_ROWS = 500_000
+ROW_INDEX_STEP = 10_000
+
+# For multi-worker deployments (e.g. several gunicorn workers) set
+# SHARED_DATA=1: each day is then converted once into an Arrow file that every
+# worker and background job memory-maps read-only, so N processes serving the
+# same date share one copy of its columns through the page cache instead of
+# each parsing its own.
+SHARED_DATA = os.environ.get('SHARED_DATA') == '1'
+arrow_cache = ArrowCache()
 
 # Initialize the Dash app
-app = dash.Dash(__name__)
+app = dash.Dash(__name__, background_callback_manager=background_callback_manager)
+# Prometheus metrics on /metrics: callback timings and payload sizes, day loads
+# and cache hit rates
+metrics.init_app(app)
 
 # Custom CSS for the app
 app.index_string = '''
@@ -58,6 +112,10 @@ app.index_string = '''
                 margin: 20px;
                 padding: 20px;
             }
+            .loading-indicator {
+                text-align: center;
+                margin: 20px;
+            }
             .histogram-plot {
                 flex: 3;
             }
@@ -83,101 +141,449 @@ app.index_string = '''
 </html>
 '''
 
-# Function to load data based on selected date
-def load_data(date):
+# Function to load data based on selected date. Parsed days are kept in a small
+# server-side cache keyed by the file's mtime and size, so toggling views or
+# changing dropdowns never re-reads the CSV unless the file itself changed.
+def data_version(date):
     filename = f"{date}.csv"
     try:
-        df = pd.read_csv(filename)
-        df['T2'] = pd.to_datetime(df['T2'])
-        df['T2_seconds'] = df['T2'].dt.floor('S')
-        df['T2_formatted'] = df['T2'].dt.strftime('%H:%M:%S.%f')
-        # Ensure latency columns are in nanoseconds
-        latency_columns = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
-        for col in latency_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            else:
-                print(f"Warning: Column {col} not found in the CSV file.")
-        
-        return df
+        stat = os.stat(filename)
     except FileNotFoundError:
+        return None
+    return filename, stat.st_mtime_ns, stat.st_size
+
+def load_data(date, progress=None):
+    version = data_version(date)
+    if version is None:
         return pd.DataFrame()  # Return empty DataFrame if file not found
+    start = time.perf_counter()
+    if SHARED_DATA:
+        df = load_shared_frame(version, progress)
+    elif progress is not None:
+        df = prepare_frame(read_csv_chunks(version[0], progress))
+    else:
+        hits = _parse_csv.cache_info().hits
+        df = _parse_csv(*version)
+        metrics.inc('dash_cache_requests_total', cache='parsed_day', result='hit' if _parse_csv.cache_info().hits > hits else 'miss')
+    metrics.observe('dash_load_data_duration_seconds', time.perf_counter() - start)
+    metrics.inc('dash_load_data_rows_total', len(df))
+    return df
 
-# Get list of available dates from CSV files
-available_dates = [f.split('.')[0] for f in os.listdir() if f.endswith('.csv') and f[0].isdigit()]
-initial_date = max(available_dates) if available_dates else datetime.now().strftime("%Y-%m-%d")
+@lru_cache(maxsize=4)
+def _parse_csv(filename, mtime_ns, size):
+    return prepare_frame(pd.read_csv(filename))
 
-# Initial data load
-df = load_data(initial_date)
+# Reads the CSV in row chunks, calling progress(bytes_read, total_bytes) after
+# each one so background callbacks can report how far along a big day is.
+def read_csv_chunks(filename, progress, chunksize=CSV_CHUNK_ROWS):
+    total = os.path.getsize(filename)
+    chunks = []
+    with open(filename, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize):
+            chunks.append(chunk)
+            progress(f.tell(), total)
+    return pd.concat(chunks, ignore_index=True)
 
-# Define the layout
-app.layout = html.Div([
-    html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
-    
-    html.Div([
-        dcc.DatePickerSingle(
-            id='date-picker',
-            date=initial_date,
-            display_format='YYYY-MM-DD',
-            style={'margin': '10px'}
-        ),
-        html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+def prepare_frame(df):
+    df['T2'] = pd.to_datetime(df['T2'])
+    df['T2_seconds'] = df['T2'].dt.floor('S')
+    df['T2_formatted'] = df['T2'].dt.strftime('%H:%M:%S.%f')
+    # Ensure latency columns are in nanoseconds
+    latency_columns = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+    for col in latency_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        else:
+            print(f"Warning: Column {col} not found in the CSV file.")
 
-    html.Div(id='content-container')
-], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
+    return df
 
-@app.callback(
-    Output('content-container', 'children'),
-    [Input('date-picker', 'date'),
-     Input('toggle-view', 'n_clicks')]
-)
-def update_dashboard(selected_date, n_clicks):
-    df = load_data(selected_date)
+# Shared mode keeps only what the analysis view aggregates: T2 (and its
+# second), the latency columns and Insert/Update. Numbers are stored without
+# nulls (NaN stays NaN) and as a single record batch, so pandas can use the
+# mapped buffers directly instead of copying them into each process.
+def convert_shared_frame(filename, path, progress):
+    total = os.path.getsize(filename)
+    latency_columns = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
+    tables = []
+    with open(filename, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=CSV_CHUNK_ROWS, usecols=lambda col: col in ['T2', 'Insert/Update', *latency_columns]):
+            t2 = pd.to_datetime(chunk['T2'])
+            columns = {'T2': t2.to_numpy(), 'T2_seconds': t2.dt.floor('S').to_numpy()}
+            for col in latency_columns:
+                if col in chunk.columns:
+                    columns[col] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype='float64')
+            if 'Insert/Update' in chunk.columns:
+                columns['Insert/Update'] = pa.array(chunk['Insert/Update'], type=pa.string(), from_pandas=True)
+            tables.append(pa.table(columns))
+            if progress is not None:
+                progress(f.tell(), total)
+    table = pa.concat_tables(tables).combine_chunks()
+    del tables
+    arrow_cache.write_table(table, path)
+
+def load_shared_frame(version, progress=None):
+    filename, mtime_ns, size = version
+    day = os.path.splitext(os.path.basename(filename))[0]
+    path = arrow_cache.path(f'{day}.frame', size, mtime_ns)
+    hit = arrow_cache.touch(path)
+    metrics.inc('dash_cache_requests_total', cache='shared_frame', result='hit' if hit else 'miss')
+    if not hit:
+        # Only one process converts; the others wait and then map its result
+        os.makedirs(arrow_cache.directory, exist_ok=True)
+        with open(os.path.join(arrow_cache.directory, '.convert.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not arrow_cache.touch(path):
+                convert_shared_frame(filename, path, progress)
+                arrow_cache.evict(keep=(path,))
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True, categories=['Insert/Update'])
+
+# Per-instrument index of a day (see instrument_index.py), built once per file
+# version into the Arrow cache and memory-mapped by every process that looks
+# an instrument up.
+@lru_cache(maxsize=4)
+def _read_instrument_index(day, mtime_ns, size):
+    index = InstrumentIndex.read(arrow_cache, f'{day}.instruments', (size, mtime_ns))
+    if index is None:
+        raise FileNotFoundError(day)
+    return index
+
+def load_instrument_index(version, progress=None):
+    filename, mtime_ns, size = version
+    day = os.path.splitext(os.path.basename(filename))[0]
+    try:
+        index = _read_instrument_index(day, mtime_ns, size)
+        metrics.inc('dash_cache_requests_total', cache='instrument_index', result='hit')
+        return index
+    except FileNotFoundError:
+        metrics.inc('dash_cache_requests_total', cache='instrument_index', result='miss')
+    os.makedirs(arrow_cache.directory, exist_ok=True)
+    with open(os.path.join(arrow_cache.directory, '.instruments.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return _read_instrument_index(day, mtime_ns, size)
+        except FileNotFoundError:
+            InstrumentIndex.build(filename, progress).write(arrow_cache, f'{day}.instruments', (size, mtime_ns))
+    return _read_instrument_index(day, mtime_ns, size)
+
+# Counts the rows of a CSV without parsing it, remembering the byte offset of
+# every ROW_INDEX_STEP-th row so table pages can later be read with a seek
+# instead of a scan from the top of the file.
+def index_rows(filename, progress, block_size=16 * 1024 * 1024):
+    total = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        header = f.readline()
+        position = len(header)
+        offsets = [position]
+        newlines = 0
+        last_byte = b'\n'
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+            # The row following the n-th newline starts right behind it
+            following = newlines + 1 + np.arange(len(ends))
+            offsets.extend((position + ends[following % ROW_INDEX_STEP == 0] + 1).tolist())
+            newlines += len(ends)
+            position += len(block)
+            last_byte = block[-1:]
+            progress(position, total)
+    if offsets[-1] >= total:
+        offsets.pop()
+    return {
+        'header': header.decode().strip().split(','),
+        'rows': newlines + (last_byte != b'\n'),
+        'step': ROW_INDEX_STEP,
+        'offsets': offsets,
+        'size': total,
+    }
+
+# Reads one table page by seeking to the closest indexed row and skipping the
+# few rows in between.
+def read_rows(filename, row_index, start, count):
+    checkpoint = start // row_index['step']
+    if checkpoint >= len(row_index['offsets']):
+        return pd.DataFrame()
+    with open(filename, 'rb') as f:
+        f.seek(row_index['offsets'][checkpoint])
+        return pd.read_csv(f, header=None, names=row_index['header'],
+                           skiprows=start - checkpoint * row_index['step'], nrows=count)
+
+latency_metrics = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
+LIVE_POLL_MS = 1000
+DRILLDOWN_COLUMNS = ['OptionEMMId', 'UnderlyingEMMId', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2', 'Insert/Update']
+DRILLDOWN_PAGE_SIZE = 10
+# The drill-down chart plots at most this many of an instrument's events
+DRILLDOWN_MAX_POINTS = 5_000
+LEADERBOARD_TOP_N = 20
+INCIDENT_TABLE_COLUMNS = [{"name": name, "id": column} for name, column in [
+    ('Start', 'start'), ('End', 'end'), ('Duration (s)', 'duration'), ('Kind', 'kind'), ('Stage', 'stage'),
+    ('Peak', 'peak'), ('Baseline', 'baseline'), ('|z|', 'z')]]
+HEATMAP_METRIC = 'T5-T2'
+SCATTER_METRIC = 'T5-T2'
+THROUGHPUT_STREAMS = {'T2': 'Arrivals (T2)', 'T5': 'Writes (T5)'}
+# The stall table lists at most this many, longest first
+THROUGHPUT_MAX_STALLS = 1_000
+# Instruments with fewer events in the window are not ranked: their p99 is
+# little more than their slowest event
+LEADERBOARD_MIN_EVENTS = 20
+
+# Available days come from the catalog; nothing is loaded at import time, so
+# the server accepts requests immediately
+catalog = Catalog()
+catalog.start()
+
+# Progress bar shown while a view's background job is running
+def loading_indicator(view_id):
+    return html.Div([
+        html.P("Loading data...", style={'color': '#34495e', 'fontSize': '18px'}),
+        html.Progress(id=f'{view_id}-progress', value='0', max='100', style={'width': '50%'})
+    ], id=f'{view_id}-loading', style={'display': 'none'}, className='loading-indicator')
+
+# Define the layout. It is served per page load so the date picker always
+# reflects the current catalog.
+def serve_layout():
+    available_dates = catalog.dates()
+    initial_date = available_dates[-1] if available_dates else datetime.now().strftime("%Y-%m-%d")
+
+    return html.Div([
+        html.H1("Performance Dashboard", style={'textAlign': 'center', 'color': '#2c3e50', 'font-family': 'Helvetica, Arial, sans-serif', 'margin-bottom': '30px'}),
     
-    if df.empty:
-        return html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+        dcc.RadioItems(
+            id='mode-selector',
+            options=[{'label': 'Single day', 'value': 'day'}, {'label': 'Date range', 'value': 'range'}, {'label': 'Live', 'value': 'live'}],
+            value='day',
+            inline=True,
+            style={'textAlign': 'center', 'marginBottom': '20px', 'fontSize': '16px'},
+            inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+        ),
 
-    t2_counts = df['T2_seconds'].value_counts().sort_index()
-    t2_df = pd.DataFrame({'Timestamp': t2_counts.index.strftime('%H:%M:%S'), 'Count': t2_counts.values})
+        html.Div([
+            html.Div([
+                dcc.DatePickerSingle(
+                    id='date-picker',
+                    date=initial_date,
+                    display_format='YYYY-MM-DD',
+                    min_date_allowed=available_dates[0] if available_dates else None,
+                    max_date_allowed=initial_date,
+                    disabled_days=catalog.missing_dates(),
+                    style={'margin': '10px'}
+                ),
+                html.Button('Toggle View', id='toggle-view', n_clicks=0, className='toggle-button'),
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+            html.Div(id='dataset-info', style={'textAlign': 'center', 'color': '#7f8c8d', 'marginTop': '10px', 'fontSize': '14px'}),
 
-    t2_hist = px.bar(t2_df, x='Timestamp', y='Count', 
-                     title='Number of Records per T2 Second',
-                     labels={'Timestamp': 'T2 Timestamp (HH:MM:SS)', 'Count': 'Number of Records'},
-                     color='Count', color_continuous_scale=px.colors.sequential.Viridis)
+            # Both views live in the page at once; the toggle only flips their
+            # visibility on the client. Each view is rendered by the server the first
+            # time it is shown for a date, tracked through the *-view-date stores.
+            html.Div([
+                html.Div([
+                    loading_indicator('table-view'),
+                    html.Div(id='table-view-content')
+                ], id='table-view'),
+                html.Div([
+                    loading_indicator('analysis-view'),
+                    html.Div(id='analysis-view-content')
+                ], id='analysis-view', style={'display': 'none'})
+            ], id='content-container'),
 
-    t2_hist.update_layout(
-        xaxis_title='T2 Timestamp (HH:MM:SS)',
-        yaxis_title='Number of Records',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Helvetica, Arial, sans-serif", size=14),
-        margin=dict(l=50, r=50, t=80, b=50),
-        title=dict(font=dict(size=24))
-    )
+            loading_indicator('instrument-index'),
+            html.Div([
+                html.H3("Slowest Instruments", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                html.Div([
+                    dcc.RadioItems(
+                        id='leaderboard-column',
+                        options=[{'label': 'Option', 'value': 'OptionEMMId'}, {'label': 'Underlying', 'value': 'UnderlyingEMMId'}],
+                        value='UnderlyingEMMId',
+                        inline=True,
+                        inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                    ),
+                    dcc.Dropdown(
+                        id='leaderboard-metric',
+                        options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                        value='T5-T4',
+                        clearable=False,
+                        style={'width': '150px', 'margin': '10px'}
+                    ),
+                    dcc.RadioItems(
+                        id='leaderboard-stat',
+                        options=[{'label': 'p99', 'value': 'p99'}, {'label': 'Mean', 'value': 'mean'}],
+                        value='p99',
+                        inline=True,
+                        inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                    ),
+                    html.Button('Rank', id='leaderboard-button', n_clicks=0, className='toggle-button'),
+                ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+                dcc.RangeSlider(id='leaderboard-window', min=0, max=24 * 60, step=1, value=[0, 24 * 60], marks=None,
+                                tooltip={'placement': 'bottom'}),
+                html.Div(id='leaderboard-status', style={'textAlign': 'center', 'color': '#7f8c8d', 'marginTop': '10px', 'fontSize': '14px'}),
+                dash_table.DataTable(
+                    id='leaderboard-table',
+                    columns=[{"name": i, "id": i} for i in ['rank', 'id', 'events', 'mean', 'p99']],
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#34495e',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
 
-    t2_hist.update_traces(marker_line_color='rgb(8,48,107)', marker_line_width=1.5)
-    t2_hist.update_xaxes(tickangle=45, tickmode='array', tickvals=t2_df['Timestamp'])
+            html.Div([
+                html.H3("Underlying Hot Spots", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                html.Div([
+                    dcc.Dropdown(
+                        id='heatmap-bucket',
+                        options=[{'label': f'{label} buckets', 'value': value} for label, value in [('1 min', '1min'), ('5 min', '5min'), ('15 min', '15min')]],
+                        value='5min',
+                        clearable=False,
+                        style={'width': '150px', 'margin': '10px'}
+                    ),
+                    dcc.Dropdown(
+                        id='heatmap-top-k',
+                        options=[{'label': f'Top {k} underlyings', 'value': k} for k in [10, 20, 50]],
+                        value=20,
+                        clearable=False,
+                        style={'width': '200px', 'margin': '10px'}
+                    ),
+                    html.Button('Show', id='heatmap-button', n_clicks=0, className='toggle-button'),
+                ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+                dcc.Graph(id='heatmap-graph', style={'display': 'none'})
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+
+            html.Div([
+                html.H3(f"Arrival Time vs {SCATTER_METRIC}", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                html.Div([
+                    html.Button('Plot', id='scatter-button', n_clicks=0, className='toggle-button'),
+                ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+                html.Div(id='scatter-status', style={'textAlign': 'center', 'color': '#7f8c8d', 'marginTop': '10px', 'fontSize': '14px'}),
+                dcc.Graph(id='scatter-graph', style={'display': 'none'}),
+                dcc.Store(id='scatter-view')
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
 
-    latency_metrics = ['T5-T4', 'T4-T3', 'T3-T2', 'T2-T1', 'T5-T2']
+            html.Div([
+                html.H3("Throughput, Bursts and Stalls", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                html.Div([
+                    dcc.RadioItems(
+                        id='throughput-stream',
+                        options=[{'label': label, 'value': stream} for stream, label in THROUGHPUT_STREAMS.items()],
+                        value='T2',
+                        inline=True,
+                        inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                    ),
+                    dcc.Dropdown(
+                        id='throughput-threshold',
+                        options=[{'label': f'Stalls over {label}', 'value': ns} for label, ns in throughput.STALL_THRESHOLDS.items()],
+                        value=throughput.STALL_THRESHOLDS['1 s'],
+                        clearable=False,
+                        style={'width': '200px', 'margin': '10px'}
+                    ),
+                    html.Button('Analyze', id='throughput-button', n_clicks=0, className='toggle-button'),
+                ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+                html.Div(id='throughput-summary', style={'textAlign': 'center', 'color': '#7f8c8d', 'marginTop': '10px', 'fontSize': '14px'}),
+                html.Div([
+                    dcc.Graph(id='throughput-graph', style={'flex': '1', 'minWidth': '450px'}),
+                    html.Div([
+                        dcc.RadioItems(
+                            id='queue-stat',
+                            options=[{'label': 'Peak in flight', 'value': 'max'}, {'label': 'Mean in flight', 'value': 'mean'}],
+                            value='max',
+                            inline=True,
+                            inputStyle={'marginLeft': '15px', 'marginRight': '5px'},
+                            style={'textAlign': 'center'}
+                        ),
+                        dcc.Graph(id='queue-graph')
+                    ], style={'flex': '1', 'minWidth': '450px'})
+                ], id='throughput-charts', style={'display': 'none'}),
+                dash_table.DataTable(
+                    id='throughput-bursts',
+                    columns=[{"name": name, "id": column} for name, column in [
+                        ('Window', 'window'), ('Busiest window starts', 'start'), ('Events', 'events'),
+                        ('Rate (events/s)', 'rate'), ('x Mean rate', 'ratio')]],
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#34495e',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                ),
+                html.Div(id='throughput-stall-status', style={'textAlign': 'center', 'color': '#7f8c8d', 'margin': '20px 0 10px', 'fontSize': '14px'}),
+                dash_table.DataTable(
+                    id='throughput-stalls',
+                    columns=[{"name": name, "id": column} for name, column in [
+                        ('Start', 'start'), ('End', 'end'), ('Gap (ms)', 'gap')]],
+                    page_size=10,
+                    sort_action='native',
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#c0392b',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
 
-    if n_clicks % 2 == 0:
-        return [
             html.Div([
-                html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
+                html.H3("Instrument Drill-down", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                html.Div([
+                    dcc.RadioItems(
+                        id='drilldown-column',
+                        options=[{'label': 'Option', 'value': 'OptionEMMId'}, {'label': 'Underlying', 'value': 'UnderlyingEMMId'}],
+                        value='OptionEMMId',
+                        inline=True,
+                        inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                    ),
+                    dcc.Input(id='drilldown-instrument', type='number', placeholder='EMM id', debounce=True, style={'width': '200px', 'margin': '10px'}),
+                ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+                html.Div(id='drilldown-summary', style={'textAlign': 'center', 'color': '#7f8c8d', 'marginTop': '10px', 'fontSize': '14px'}),
                 html.Div([
+                    dcc.Graph(id='drilldown-graph'),
                     dash_table.DataTable(
-                        id='table1',
-                        columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written'], {"name": "T2", "id": "T2_formatted"},],
-                        data=df.to_dict('records'),
-                        page_size=5,
+                        id='drilldown-table',
+                        columns=[{"name": "T2", "id": "T2_formatted"}] + [{"name": i, "id": i} for i in DRILLDOWN_COLUMNS],
+                        page_current=0,
+                        page_size=DRILLDOWN_PAGE_SIZE,
+                        page_action='custom',
+                        page_count=1,
                         style_cell={
                             'textAlign': 'left',
                             'padding': '10px',
                             'font-family': 'Helvetica, Arial, sans-serif'
                         },
                         style_header={
-                            'backgroundColor': '#3498db',
+                            'backgroundColor': '#34495e',
                             'color': 'white',
                             'fontWeight': 'bold'
                         },
@@ -188,24 +594,75 @@ def update_dashboard(selected_date, n_clicks):
                             }
                         ]
                     )
-                ], className='table-container')
+                ], id='drilldown-content', style={'display': 'none'})
             ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-            
+        ], id='day-mode'),
+
+        html.Div([
             html.Div([
-                html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
+                dcc.DatePickerRange(
+                    id='range-picker',
+                    start_date=available_dates[-30:][0] if available_dates else initial_date,
+                    end_date=initial_date,
+                    display_format='YYYY-MM-DD',
+                    min_date_allowed=available_dates[0] if available_dates else None,
+                    max_date_allowed=initial_date,
+                    disabled_days=catalog.missing_dates(),
+                    style={'margin': '10px'}
+                ),
+                dcc.Dropdown(
+                    id='range-metric-dropdown',
+                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                    value='T5-T2',
+                    clearable=False,
+                    style={'width': '200px', 'margin': '10px'}
+                ),
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+            loading_indicator('range-view'),
+            html.Div([
+                html.H3("Daily Latency Percentiles", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                dcc.Graph(id='range-trend-graph')
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+            html.Div([
+                html.H3("Latency Distribution by Day", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                dcc.Graph(id='range-histogram-graph')
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
+        ], id='range-mode', style={'display': 'none'}),
+
+        html.Div([
+            html.Div([
+                dcc.Dropdown(
+                    id='live-metric-dropdown',
+                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                    value='T5-T2',
+                    clearable=False,
+                    style={'width': '200px', 'margin': '10px'}
+                ),
+                html.Span(id='live-status', style={'color': '#7f8c8d', 'fontSize': '14px', 'margin': '10px'}),
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'backgroundColor': '#ecf0f1', 'padding': '20px', 'borderRadius': '10px', 'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'}),
+            html.Div([
+                html.H3("Records per T2 Second (Live)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                dcc.Graph(id='live-t2-graph')
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+            html.Div([
+                html.H3("Latency Distribution (Live)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+                dcc.Graph(id='live-latency-graph')
+            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+            html.Div([
+                html.H3("Incidents (Live)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
                 html.Div([
                     dash_table.DataTable(
-                        id='table2',
-                        columns=[{"name": i, "id": i} for i in ['OptionEMMId', 'UnderlyingEMMId', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2', 'Insert/Update']],
-                        data=df.to_dict('records'),
-                        page_size=5,
+                        id='live-incident-table',
+                        columns=INCIDENT_TABLE_COLUMNS,
+                        page_size=10,
+                        sort_action='native',
                         style_cell={
                             'textAlign': 'left',
                             'padding': '10px',
                             'font-family': 'Helvetica, Arial, sans-serif'
                         },
                         style_header={
-                            'backgroundColor': '#e74c3c',
+                            'backgroundColor': '#c0392b',
                             'color': 'white',
                             'fontWeight': 'bold'
                         },
@@ -217,80 +674,185 @@ def update_dashboard(selected_date, n_clicks):
                         ]
                     )
                 ], className='table-container')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        ]
-    else:
-        return html.Div([
-            html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '28px'}),
-            html.Div([
-                html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-                dcc.Graph(figure=t2_hist)
             ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-            html.Div([
-                html.H3("Latency Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-                dcc.Dropdown(
-                    id='latency-dropdown',
-                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
-                    value=latency_metrics[0],
-                    style={'width': '50%', 'margin': '10px auto'}
-                ),
-                html.Div(id='latency-histogram-card', className='histogram-card')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
-        #     html.Div([
-        #         html.H3("Insert/Update Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-        #         html.Div([
-        #             dcc.Dropdown(
-        #                 id='insert-update-dropdown',
-        #                 options=[
-        #                     {'label': 'Insert', 'value': 'I'},
-        #                     {'label': 'Update', 'value': 'U'}
-        #                 ],
-        #                 value='I',
-        #                 style={'width': '45%', 'display': 'inline-block', 'marginRight': '5%'}
-        #             ),
-        #             dcc.Dropdown(
-        #                 id='latency-metric-dropdown',
-        #                 options=[{'label': metric, 'value': metric} for metric in latency_metrics],
-        #                 value='T5-T4',
-        #                 style={'width': '45%', 'display': 'inline-block'}
-        #             ),
-        #         ], style={'marginBottom': '20px'}),
-        #         html.Div(id='insert-update-histogram-card', className='histogram-card')
-        #     ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        # ])
-        html.Div([
-                html.H3("Insert/Update Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
-                html.Div([
-                    dcc.Dropdown(
-                        id='insert-update-dropdown',
-                        options=[
-                            {'label': 'Insert', 'value': 'I'},
-                            {'label': 'Update', 'value': 'U'}
-                        ],
-                        value='I',  # Set default value to 'I' for Insert
-                        style={'width': '100%', 'marginBottom': '20px'}
-                    ),
-                ], style={'marginBottom': '20px'}),
-                html.Div(id='insert-update-histogram-card', className='histogram-card')
-            ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
-        ])
+            dcc.Interval(id='live-interval', interval=LIVE_POLL_MS, disabled=True),
+            dcc.Store(id='live-state')
+        ], id='live-mode', style={'display': 'none'}),
 
+        dcc.Store(id='table-view-request'),
+        dcc.Store(id='analysis-view-request'),
+        dcc.Store(id='table-view-date'),
+        dcc.Store(id='analysis-view-date'),
+        dcc.Store(id='table-view-index'),
+        dcc.Store(id='analysis-summary'),
+        dcc.Store(id='range-summaries'),
+        dcc.Store(id='instrument-index-request'),
+        dcc.Store(id='instrument-index-date'),
+        dcc.Store(id='drilldown-selection')
+    ], style={'backgroundColor': '#f5f6fa', 'padding': '20px', 'minHeight': '100vh'})
 
-@app.callback(
-    Output('latency-histogram-card', 'children'),
-    [Input('latency-dropdown', 'value'),
-     Input('date-picker', 'date')]
-)
-def update_latency_histogram(selected_metric, selected_date):
-    df = load_data(selected_date)
-    
+app.layout = serve_layout
+
+TABLE_PAGE_SIZE = 5
+HISTOGRAM_BINS = 100
+TABLE1_COLUMNS = ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written', 'T2_formatted']
+TABLE2_COLUMNS = ['OptionEMMId', 'UnderlyingEMMId', 'T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2', 'Insert/Update']
+
+def no_data_message():
+    return html.Div("No data available for the selected date.", style={'textAlign': 'center', 'marginTop': '20px', 'color': '#e74c3c', 'fontSize': '18px'})
+
+def build_t2_histogram(df):
+    t2_counts = df['T2_seconds'].value_counts().sort_index()
+    t2_df = pd.DataFrame({'Timestamp': t2_counts.index.strftime('%H:%M:%S'), 'Count': t2_counts.values})
+
+    t2_hist = px.bar(t2_df, x='Timestamp', y='Count', 
+                     title='Number of Records per T2 Second',
+                     labels={'Timestamp': 'T2 Timestamp (HH:MM:SS)', 'Count': 'Number of Records'},
+                     color='Count', color_continuous_scale=px.colors.sequential.Viridis)
+
+    t2_hist.update_layout(
+        xaxis_title='T2 Timestamp (HH:MM:SS)',
+        yaxis_title='Number of Records',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=80, b=50),
+        title=dict(font=dict(size=24))
+    )
+
+    t2_hist.update_traces(marker_line_color='rgb(8,48,107)', marker_line_width=1.5)
+    t2_hist.update_xaxes(tickangle=45, tickmode='array', tickvals=t2_df['Timestamp'])
+
+    return t2_hist
+
+# Everything the latency cards need for one day: a fixed-bin histogram and the
+# summary statistics per metric, plus the same for every metric split by
+# Insert/Update. It is small enough to live in a dcc.Store, so switching
+# dropdowns never touches the raw rows.
+def summarize_latency(values):
+    values = values.dropna().to_numpy()
+    if len(values) == 0:
+        return None
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'counts': counts.tolist(),
+        'edges': edges.tolist(),
+        'min': float(values.min()),
+        'mean': float(values.mean()),
+        'median': float(np.median(values)),
+        'max': float(values.max()),
+    }
+
+INSERT_UPDATE_PERCENTILES = {'p90': 0.9, 'p99': 0.99}
+
+# Every metric for every event type from one group-by over the type codes.
+# The histograms span each group's own range like summarize_latency's; the
+# bin of every row is computed for all groups at once and counted with one
+# bincount per metric.
+def summarize_insert_update(df):
+    metrics_present = [metric for metric in latency_metrics if metric in df.columns]
+    codes, types = pd.factorize(df['Insert/Update'], sort=True)
+    summary = {selected_type: {metric: None for metric in metrics_present} for selected_type in ['I', 'U']}
+    if not metrics_present or len(types) == 0:
+        return summary
+
+    values = df[metrics_present].set_axis(metrics_present, axis=1)
+    grouped = values[codes >= 0].groupby(codes[codes >= 0])
+    aggregates = grouped.agg(['count', 'min', 'mean', 'median', 'max'])
+    quantiles = grouped.quantile(list(INSERT_UPDATE_PERCENTILES.values()))
+
+    for metric in metrics_present:
+        column = values[metric].to_numpy(dtype='float64')
+        valid = (codes >= 0) & ~np.isnan(column)
+        lo = aggregates[(metric, 'min')].reindex(range(len(types))).to_numpy()
+        hi = aggregates[(metric, 'max')].reindex(range(len(types))).to_numpy()
+        # np.histogram widens an empty range to +/- 0.5
+        flat = hi <= lo
+        lo = np.where(flat, lo - 0.5, lo)
+        hi = np.where(flat, hi + 0.5, hi)
+        group = codes[valid]
+        bins = ((column[valid] - lo[group]) / (hi - lo)[group] * HISTOGRAM_BINS).astype(np.int64)
+        bins = np.clip(bins, 0, HISTOGRAM_BINS - 1)
+        counts = np.bincount(group * HISTOGRAM_BINS + bins, minlength=len(types) * HISTOGRAM_BINS).reshape(len(types), HISTOGRAM_BINS)
+
+        for code, selected_type in enumerate(types):
+            if selected_type not in summary or code not in aggregates.index or aggregates.at[code, (metric, 'count')] == 0:
+                continue
+            stats = aggregates.loc[code, metric]
+            summary[selected_type][metric] = {
+                'counts': counts[code].tolist(),
+                'edges': np.linspace(lo[code], hi[code], HISTOGRAM_BINS + 1).tolist(),
+                'count': int(stats['count']),
+                'min': float(stats['min']),
+                'mean': float(stats['mean']),
+                'median': float(stats['median']),
+                'max': float(stats['max']),
+                **{name: float(quantiles.at[(code, q), metric]) for name, q in INSERT_UPDATE_PERCENTILES.items()},
+            }
+    return summary
+
+SERIES_RESOLUTIONS = {'1s': 'second', '1min': 'minute'}
+SERIES_PERCENTILES = {'p50': 50, 'p99': 99, 'p99.9': 99.9}
+# The hops from feed to written, in pipeline order, and what each one's
+# contribution to the end-to-end latency is drawn as
+STAGE_METRICS = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4']
+STAGE_STATS = {'mean': 'Mean', 'p99': 'p99'}
+
+# p50/p99/p99.9, max and sum of every metric per T2 second or minute, and
+# the number of rows in each. Rows get the code of their bucket and each
+# metric is one grouped_percentiles call: a sort by (bucket, value) and an
+# interpolation per bucket. Bucket starts are in ns.
+def summarize_series(df, resolution):
+    if 'T2' not in df.columns or len(df) == 0:
+        return None
+    step = pd.Timedelta(resolution).value
+    t2 = df['T2'].to_numpy(dtype='datetime64[ns]')
+    valid = ~np.isnat(t2)
+    if not valid.any():
+        return None
+    buckets = t2.view(np.int64) // step
+    first = buckets[valid].min()
+    codes = buckets - first
+    size = int(codes[valid].max()) + 1
+    series = {'starts': (first + np.arange(size)) * step, 'rows': np.bincount(codes[valid], minlength=size)}
+    for metric in latency_metrics:
+        if metric not in df.columns:
+            continue
+        values = df[metric].to_numpy(dtype='float64')
+        keep = valid & ~np.isnan(values)
+        counts, percentiles = day_summary.grouped_percentiles(codes[keep], values[keep], size, [*SERIES_PERCENTILES.values(), 100])
+        sums = np.bincount(codes[keep], weights=values[keep], minlength=size)
+        series[metric] = {'counts': counts, 'sum': sums, **dict(zip([*SERIES_PERCENTILES, 'max'], percentiles))}
+    return series
+
+# Spikes and stalls over the day's per-second series (see anomalies.py)
+def detect_incidents(series):
+    if series is None:
+        return []
+    detector = anomalies.IncidentDetector()
+    detector.update(series['starts'] // 1_000_000_000, series['rows'],
+                    {metric: series[metric]['max'] for metric in latency_metrics if metric in series})
+    return detector.incidents
+
+def summarize_day(df):
+    series = {resolution: summarize_series(df, resolution) for resolution in SERIES_RESOLUTIONS}
+    return {
+        'latency': {metric: summarize_latency(df[metric]) for metric in latency_metrics if metric in df.columns},
+        'insert_update': summarize_insert_update(df),
+        'series': series,
+        'incidents': detect_incidents(series['1s']),
+    }
+
+def build_histogram_figure(title, stats):
+    edges = np.asarray(stats['edges'])
     fig = go.Figure()
-    fig.add_trace(go.Histogram(x=df[selected_metric], name=selected_metric))
+    fig.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=stats['counts'], width=np.diff(edges), name=title))
     fig.update_layout(
-        title=dict(text=f'{selected_metric} Latency Distribution', font=dict(size=22)),
+        title=dict(text=title, font=dict(size=22)),
         xaxis_title=dict(text='Latency (ns)', font=dict(size=16)),
         yaxis_title=dict(text='Frequency', font=dict(size=16)),
         showlegend=False,
+        bargap=0,
         font=dict(family="Helvetica, Arial, sans-serif", size=14),
         margin=dict(l=50, r=50, t=100, b=50),
         plot_bgcolor='rgba(0,0,0,0)',
@@ -298,94 +860,1466 @@ def update_latency_histogram(selected_metric, selected_date):
     )
     fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    
+    return fig
+
+def build_histogram_stats(stats):
     return [
-        html.Div([
-            dcc.Graph(figure=fig)
-        ], className='histogram-plot'),
-        html.Div([
-            html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
-            html.P(f"Min: {df[selected_metric].min():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Mean: {df[selected_metric].mean():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Median: {df[selected_metric].median():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Max: {df[selected_metric].max():.2f} ns", style={'fontSize': '18px'})
-        ], className='histogram-stats')
+        html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
+        html.P(f"Min: {stats['min']:.2f} ns", style={'fontSize': '18px'}),
+        html.P(f"Mean: {stats['mean']:.2f} ns", style={'fontSize': '18px'}),
+        html.P(f"Median: {stats['median']:.2f} ns", style={'fontSize': '18px'}),
+        html.P(f"Max: {stats['max']:.2f} ns", style={'fontSize': '18px'}),
+        *[html.P(f"{name}: {stats[name]:.2f} ns", style={'fontSize': '18px'}) for name in INSERT_UPDATE_PERCENTILES if name in stats],
+        *([html.P(f"Count: {stats['count']:,}", style={'fontSize': '18px'})] if 'count' in stats else []),
     ]
 
-@app.callback(
-    Output('insert-update-histogram-card', 'children'),
-    [Input('insert-update-dropdown', 'value'),
-     Input('date-picker', 'date')]
-)
+# Times are sent as float epoch milliseconds and latencies as float32, which
+# plotly serializes as compact binary arrays; a date axis reads the numbers
+# as (naive) times
+def build_series_figure(series, resolution, metric):
+    stats = series[metric]
+    present = stats['counts'] > 0
+    x = (series['starts'][present] // 1_000_000).astype('float64')
+    fig = go.Figure()
+    for name in SERIES_PERCENTILES:
+        fig.add_trace(go.Scattergl(x=x, y=stats[name][present].astype('float32'), mode='lines', name=name))
+    fig.update_layout(
+        title=dict(text=f'{metric} Percentiles per {SERIES_RESOLUTIONS[resolution].title()}', font=dict(size=22)),
+        xaxis_title='T2',
+        yaxis_title='Latency (ns)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=100, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        hovermode='x unified',
+    )
+    fig.update_xaxes(type='date', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_yaxes(type='log', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    return fig
 
-# def update_insert_update_histogram(selected_type, selected_metric, selected_date):
-#     df = load_data(selected_date)
-    
-#     filtered_df = df[df['Insert/Update'] == selected_type]
-    
-#     fig = go.Figure()
-#     fig.add_trace(go.Histogram(x=filtered_df[selected_metric], name=f'{selected_type} {selected_metric}'))
-#     fig.update_layout(
-#         title=dict(text=f'{selected_type} {selected_metric} Latency Distribution', font=dict(size=22)),
-#         xaxis_title=dict(text='Latency (ns)', font=dict(size=16)),
-#         yaxis_title=dict(text='Frequency', font=dict(size=16)),
-#         showlegend=False,
-#         font=dict(family="Helvetica, Arial, sans-serif", size=14),
-#         margin=dict(l=50, r=50, t=100, b=50),
-#         plot_bgcolor='rgba(0,0,0,0)',
-#         paper_bgcolor='rgba(0,0,0,0)',
-#     )
-#     fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-#     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    
-#     return [
-#         html.Div([
-#             dcc.Graph(figure=fig)
-#         ], className='histogram-plot'),
-#         html.Div([
-#             html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
-#             html.P(f"Min: {filtered_df[selected_metric].min():.2f} ns", style={'fontSize': '18px'}),
-#             html.P(f"Mean: {filtered_df[selected_metric].mean():.2f} ns", style={'fontSize': '18px'}),
-#             html.P(f"Median: {filtered_df[selected_metric].median():.2f} ns", style={'fontSize': '18px'}),
-#             html.P(f"Max: {filtered_df[selected_metric].max():.2f} ns", style={'fontSize': '18px'})
-#         ], className='histogram-stats')
-#     ]
-
-# if __name__ == '__main__':
-#     app.run_server(debug=True)
-def update_insert_update_histogram(selected_type, selected_date):
-    df = load_data(selected_date)
-    
-    filtered_df = df[df['Insert/Update'] == selected_type]
-    selected_metric = 'T5-T4'  # Fixed to T5-T4
-    
+# Each hop's mean or p99 per bucket stacked in pipeline order, over the
+# buckets where every hop has events. Stacking p99s shows how the tail is
+# split between the hops; their total is not the p99 of T5-T2. Scattergl
+# has no stackgroup, so the running totals are drawn filled to the trace
+# below, and the hover shows each hop's own value. With no hop columns the
+# figure is empty.
+def build_stage_figure(series, resolution, stat):
+    stages = [metric for metric in STAGE_METRICS if metric in series]
+    if not stages:
+        return go.Figure()
+    present = np.logical_and.reduce([series[metric]['counts'] > 0 for metric in stages])
+    x = (series['starts'][present] // 1_000_000).astype('float64')
     fig = go.Figure()
-    fig.add_trace(go.Histogram(x=filtered_df[selected_metric], name=f'{selected_type} {selected_metric}'))
+    total = np.zeros(int(present.sum()))
+    for metric in stages:
+        stats = series[metric]
+        if stat == 'mean':
+            values = stats['sum'][present] / stats['counts'][present]
+        else:
+            values = stats[stat][present]
+        total = total + values
+        fig.add_trace(go.Scattergl(
+            x=x, y=total.astype('float32'), customdata=values.astype('float32'), mode='lines', line=dict(width=0.5),
+            fill='tozeroy' if metric == stages[0] else 'tonexty', name=metric,
+            hovertemplate='%{customdata:.0f} ns'))
     fig.update_layout(
-        title=dict(text=f'{selected_type} {selected_metric} Latency Distribution', font=dict(size=22)),
-        xaxis_title=dict(text='Latency (ns)', font=dict(size=16)),
-        yaxis_title=dict(text='Frequency', font=dict(size=16)),
-        showlegend=False,
+        title=dict(text=f'{STAGE_STATS[stat]} Latency per Hop per {SERIES_RESOLUTIONS[resolution].title()}', font=dict(size=22)),
+        xaxis_title='T2',
+        yaxis_title='Latency (ns)',
         font=dict(family="Helvetica, Arial, sans-serif", size=14),
         margin=dict(l=50, r=50, t=100, b=50),
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
+        hovermode='x unified',
     )
-    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_xaxes(type='date', showgrid=True, gridwidth=1, gridcolor='lightgrey')
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
-    
+    return fig
+
+# Every figure part of a day's analysis view, serialized (orjson via plotly)
+def figure_parts(df, summary):
+    parts = {'t2': to_json_plotly(build_t2_histogram(df), engine='orjson').encode(),
+             'incidents': orjson.dumps(anomalies.incident_frame(summary['incidents']).to_dict('records'))}
+    for resolution, series in summary['series'].items():
+        for metric in latency_metrics:
+            parts[f'series-{resolution}-{metric}'] = b'null' if series is None or metric not in series else to_json_plotly(
+                build_series_figure(series, resolution, metric), engine='orjson').encode()
+        for stat in STAGE_STATS:
+            parts[f'stages-{resolution}-{stat}'] = b'null' if series is None or not any(metric in series for metric in STAGE_METRICS) else to_json_plotly(
+                build_stage_figure(series, resolution, stat), engine='orjson').encode()
+    cards = {f'latency-{metric}': (f'{metric} Latency Distribution', stats) for metric, stats in summary['latency'].items()}
+    cards.update({f'insert-update-{selected_type}-{metric}': (f'{selected_type} {metric} Latency Distribution', stats)
+                  for selected_type, by_metric in summary['insert_update'].items() for metric, stats in by_metric.items()})
+    for part, (title, stats) in cards.items():
+        parts[part] = b'null' if stats is None else to_json_plotly(
+            {'figure': build_histogram_figure(title, stats), 'stats': build_histogram_stats(stats)}, engine='orjson').encode()
+    return parts
+
+FIGURE_PARTS = ({'t2', 'incidents'} | {f'latency-{metric}' for metric in latency_metrics}
+                | {f'insert-update-{selected_type}-{metric}' for selected_type in ['I', 'U'] for metric in latency_metrics}
+                | {f'series-{resolution}-{metric}' for resolution in SERIES_RESOLUTIONS for metric in latency_metrics}
+                | {f'stages-{resolution}-{stat}' for resolution in SERIES_RESOLUTIONS for stat in STAGE_STATS})
+
+def store_figure_parts(date, version, parts):
+    for part, body in parts.items():
+        figure_cache.set((date, part, version[1], version[2]), body)
+
+def is_closed_day(date):
+    return date < datetime.now().strftime("%Y-%m-%d")
+
+def snapshot_dir(date):
+    return os.path.join(SNAPSHOT_DIR, date)
+
+# The day's snapshot manifest, or None if there is none for this version of
+# its file or it is missing parts
+def read_snapshot(date, version):
+    try:
+        with open(os.path.join(snapshot_dir(date), 'manifest.json'), 'rb') as f:
+            manifest = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if manifest['source'] != {'size': version[2], 'mtime_ns': version[1]}:
+        return None
+    # Bundles baked before a figure part existed are baked again
+    if not FIGURE_PARTS <= set(manifest['parts']):
+        return None
+    return manifest
+
+def read_snapshot_part(date, part):
+    with open(os.path.join(snapshot_dir(date), f'{part}.json'), 'rb') as f:
+        return orjson.loads(f.read())
+
+# Writes the snapshot bundle of a day, computing whatever the caller does not
+# already have. The ETag is a hash of the bundle's contents.
+def bake_snapshot(date, df=None, parts=None, row_index=None):
+    version = data_version(date)
+    if version is None:
+        return None
+    if parts is None:
+        if df is None:
+            df = load_data(date)
+        parts = figure_parts(df, summarize_day(df))
+    if row_index is None:
+        row_index = index_rows(version[0], lambda done, total: None)
+    parts = {**parts, 'table-index': orjson.dumps(row_index)}
+    manifest = {
+        'date': date,
+        'source': {'size': version[2], 'mtime_ns': version[1]},
+        'etag': hashlib.sha1(b''.join(parts[part] for part in sorted(parts))).hexdigest()[:20],
+        'rows': row_index['rows'],
+        'parts': sorted(parts),
+    }
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=SNAPSHOT_DIR, prefix=f'.{date}.', suffix='.tmp')
+    for part, body in parts.items():
+        with open(os.path.join(tmp_dir, f'{part}.json'), 'wb') as f:
+            f.write(body)
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'wb') as f:
+        f.write(orjson.dumps(manifest))
+    swap_snapshot(tmp_dir, snapshot_dir(date))
+    return manifest
+
+# Puts a new bundle in place of the old one. A directory cannot be replaced
+# while it has files in it, so the old bundle is renamed aside first and only
+# deleted once the new one is in; the day is without a bundle only between
+# the two renames. Another bake may land its bundle in that moment, in which
+# case it is moved aside as well.
+def swap_snapshot(tmp_dir, target):
+    old_dirs = []
+    while True:
+        old_dir = f'{tmp_dir}.{len(old_dirs)}.old'
+        try:
+            os.rename(target, old_dir)
+            old_dirs.append(old_dir)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp_dir, target)
+            break
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+    for old_dir in old_dirs:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+# Serialized figure parts for the browser. Baked days are sent from their
+# snapshot with an ETag; requests carrying the bundle's ETag as ?v= may be
+# cached by the browser for good, since that URL can never change. Other
+# days come from the figure cache, and if a part was evicted the day is
+# summarized again here. Parts are fetched in parallel, so only one request
+# (in any process) rebuilds a day; the others wait for it and then read the
+# parts it stored.
+@app.server.route('/figures/<date>/<part>')
+def figure_part(date, part):
+    version = data_version(date)
+    if version is None or part not in FIGURE_PARTS:
+        flask.abort(404)
+    manifest = read_snapshot(date, version)
+    if manifest is not None:
+        metrics.inc('dash_cache_requests_total', cache='snapshot', result='hit')
+        response = flask.send_file(os.path.abspath(os.path.join(snapshot_dir(date), f'{part}.json')), mimetype='application/json',
+                                   etag=f"{manifest['etag']}-{part}", conditional=True)
+        if flask.request.args.get('v') == manifest['etag']:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    key = (date, part, version[1], version[2])
+    body = figure_cache.get(key)
+    metrics.inc('dash_cache_requests_total', cache='figure', result='miss' if body is None else 'hit')
+    if body is None:
+        with open(os.path.join(figure_cache.directory, f'.rebuild-{date}.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            body = figure_cache.get(key)
+            if body is None:
+                df = load_data(date)
+                parts = figure_parts(df, summarize_day(df))
+                store_figure_parts(date, version, parts)
+                body = parts.get(part, b'null')
+    response = flask.Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Table view: only the row count is needed up front, the rows themselves are
+# read page by page from the file by the paging callbacks below.
+def build_table_view(row_index):
+    page_count = max(1, math.ceil(row_index['rows'] / TABLE_PAGE_SIZE))
     return [
         html.Div([
-            dcc.Graph(figure=fig)
-        ], className='histogram-plot'),
+            html.H2("Performance Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
+            html.Div([
+                dash_table.DataTable(
+                    id='table1',
+                    columns=[{"name": i, "id": i} for i in ['ts_Amps', 'ts_tcp_recv', 'ts_thr_recv', 'ts_converted', 'ts_written']] + [{"name": "T2", "id": "T2_formatted"}],
+                    page_current=0,
+                    page_size=TABLE_PAGE_SIZE,
+                    page_action='custom',
+                    page_count=page_count,
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#3498db',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], className='table-container')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+            
         html.Div([
-            html.H4("Statistics", style={'fontSize': '24px', 'marginBottom': '20px'}),
-            html.P(f"Min: {filtered_df[selected_metric].min():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Mean: {filtered_df[selected_metric].mean():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Median: {filtered_df[selected_metric].median():.2f} ns", style={'fontSize': '18px'}),
-            html.P(f"Max: {filtered_df[selected_metric].max():.2f} ns", style={'fontSize': '18px'})
-        ], className='histogram-stats')
+            html.H2("Timing Metrics", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '24px'}),
+            html.Div([
+                dash_table.DataTable(
+                    id='table2',
+                    columns=[{"name": i, "id": i} for i in TABLE2_COLUMNS],
+                    page_current=0,
+                    page_size=TABLE_PAGE_SIZE,
+                    page_action='custom',
+                    page_count=page_count,
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#e74c3c',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], className='table-container')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
     ]
 
+# Analysis view: only the layout; the T2 chart and the latency cards are
+# fetched as serialized figure parts by clientside callbacks.
+def build_analysis_view():
+    return html.Div([
+        html.H2("Data Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '28px'}),
+        html.Div([
+            html.H3("T2 Timestamp Analysis (Second Precision)", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            dcc.Graph(id='t2-histogram-graph')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Latency Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            dcc.Dropdown(
+                id='latency-dropdown',
+                options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                value=latency_metrics[0],
+                style={'width': '50%', 'margin': '10px auto'}
+            ),
+            html.Div([
+                html.Div([
+                    dcc.Graph(id='latency-histogram-graph')
+                ], className='histogram-plot'),
+                html.Div(id='latency-histogram-stats', className='histogram-stats')
+            ], id='latency-histogram-card', className='histogram-card')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Latency Percentiles over the Day", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            html.Div([
+                dcc.Dropdown(
+                    id='series-metric-dropdown',
+                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                    value='T5-T2',
+                    clearable=False,
+                    style={'width': '200px', 'margin': '10px'}
+                ),
+                dcc.RadioItems(
+                    id='series-resolution',
+                    options=[{'label': f'Per {label}', 'value': resolution} for resolution, label in SERIES_RESOLUTIONS.items()],
+                    value='1min',
+                    inline=True,
+                    inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                ),
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+            dcc.Graph(id='series-graph')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Stage Contributions over the Day", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            html.Div([
+                dcc.RadioItems(
+                    id='stage-stat',
+                    options=[{'label': label, 'value': stat} for stat, label in STAGE_STATS.items()],
+                    value='mean',
+                    inline=True,
+                    inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                ),
+                dcc.RadioItems(
+                    id='stage-resolution',
+                    options=[{'label': f'Per {label}', 'value': resolution} for resolution, label in SERIES_RESOLUTIONS.items()],
+                    value='1min',
+                    inline=True,
+                    inputStyle={'marginLeft': '15px', 'marginRight': '5px'}
+                ),
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center'}),
+            dcc.Graph(id='stage-graph')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Incidents", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            html.Div([
+                dash_table.DataTable(
+                    id='incident-table',
+                    columns=INCIDENT_TABLE_COLUMNS,
+                    page_size=10,
+                    sort_action='native',
+                    style_cell={
+                        'textAlign': 'left',
+                        'padding': '10px',
+                        'font-family': 'Helvetica, Arial, sans-serif'
+                    },
+                    style_header={
+                        'backgroundColor': '#c0392b',
+                        'color': 'white',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#f2f2f2'
+                        }
+                    ]
+                )
+            ], className='table-container')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'}),
+        html.Div([
+            html.H3("Insert/Update Analysis", style={'color': '#34495e', 'textAlign': 'center', 'fontSize': '22px'}),
+            html.Div([
+                dcc.Dropdown(
+                    id='insert-update-dropdown',
+                    options=[
+                        {'label': 'Insert', 'value': 'I'},
+                        {'label': 'Update', 'value': 'U'}
+                    ],
+                    value='I',  # Set default value to 'I' for Insert
+                    style={'width': '45%', 'display': 'inline-block', 'marginRight': '5%'}
+                ),
+                dcc.Dropdown(
+                    id='insert-update-metric-dropdown',
+                    options=[{'label': metric, 'value': metric} for metric in latency_metrics],
+                    value='T5-T4',
+                    style={'width': '45%', 'display': 'inline-block'}
+                ),
+            ], style={'marginBottom': '20px'}),
+            html.Div([
+                html.Div([
+                    dcc.Graph(id='insert-update-histogram-graph')
+                ], className='histogram-plot'),
+                html.Div(id='insert-update-histogram-stats', className='histogram-stats')
+            ], id='insert-update-histogram-card', className='histogram-card')
+        ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '10px', 'boxShadow': '0px 0px 10px rgba(0,0,0,0.1)'})
+    ])
+
+
+@app.callback(
+    Output('dataset-info', 'children'),
+    Input('date-picker', 'date')
+)
+@profiling.profiled
+def update_dataset_info(selected_date):
+    entry = catalog.get(selected_date)
+    if entry is None:
+        return "No data available for the selected date."
+
+    size = f"{entry['size'] / 1e6:,.1f} MB {entry['format'].upper()}"
+    if 'rows' not in entry:
+        return f"{size}, indexing..."
+    if entry['rows'] is None:
+        return f"{size}, could not be indexed"
+    if not entry['rows']:
+        return f"{size}, no rows"
+    return f"{size}, {entry['rows']:,} rows, T2 {entry['t2_min']} to {entry['t2_max']}"
+
+app.clientside_callback(
+    """
+    function(n_clicks, selectedDate, tableDate, analysisDate) {
+        const showTable = n_clicks % 2 === 0;
+        const noUpdate = window.dash_clientside.no_update;
+        return [
+            {'display': showTable ? 'block' : 'none'},
+            {'display': showTable ? 'none' : 'block'},
+            showTable && tableDate !== selectedDate ? selectedDate : noUpdate,
+            !showTable && analysisDate !== selectedDate ? selectedDate : noUpdate
+        ];
+    }
+    """,
+    [Output('table-view', 'style'),
+     Output('analysis-view', 'style'),
+     Output('table-view-request', 'data'),
+     Output('analysis-view-request', 'data')],
+    [Input('toggle-view', 'n_clicks'),
+     Input('date-picker', 'date')],
+    [State('table-view-date', 'data'),
+     State('analysis-view-date', 'data')]
+)
+
+@app.callback(
+    [Output('table-view-content', 'children'),
+     Output('table-view-index', 'data'),
+     Output('table-view-date', 'data')],
+    Input('table-view-request', 'data'),
+    background=True,
+    progress=[Output('table-view-progress', 'value'),
+              Output('table-view-progress', 'max')],
+    running=[(Output('table-view-loading', 'style'), {'display': 'block'}, {'display': 'none'})],
+    cancel=[Input('date-picker', 'date')],
+    prevent_initial_call=True
+)
+@metrics.flush_after
+@profiling.profiled
+def update_table_view(set_progress, selected_date):
+    version = data_version(selected_date)
+    if version is None:
+        return no_data_message(), None, selected_date
+
+    if read_snapshot(selected_date, version) is not None:
+        row_index = read_snapshot_part(selected_date, 'table-index')
+    else:
+        row_index = index_rows(version[0], lambda done, total: set_progress((done, total)))
+        # A closed day whose figures were built already is baked here, with
+        # the index just made rather than a second scan of the file
+        if is_closed_day(selected_date):
+            parts = {part: figure_cache.get((selected_date, part, version[1], version[2])) for part in FIGURE_PARTS}
+            if all(body is not None for body in parts.values()):
+                bake_snapshot(selected_date, parts=parts, row_index=row_index)
+    return build_table_view(row_index), row_index, selected_date
+
+@app.callback(
+    [Output('analysis-view-content', 'children'),
+     Output('analysis-summary', 'data'),
+     Output('analysis-view-date', 'data')],
+    Input('analysis-view-request', 'data'),
+    [State('table-view-date', 'data'),
+     State('table-view-index', 'data')],
+    background=True,
+    progress=[Output('analysis-view-progress', 'value'),
+              Output('analysis-view-progress', 'max')],
+    running=[(Output('analysis-view-loading', 'style'), {'display': 'block'}, {'display': 'none'})],
+    cancel=[Input('date-picker', 'date')],
+    prevent_initial_call=True
+)
+@metrics.flush_after
+@profiling.profiled
+def update_analysis_view(set_progress, selected_date, table_date, row_index):
+    version = data_version(selected_date)
+    if version is None:
+        return no_data_message(), None, selected_date
+    # A baked day needs no work at all: the browser fetches its figures from
+    # the snapshot
+    manifest = read_snapshot(selected_date, version)
+    if manifest is not None:
+        return build_analysis_view(), {'date': selected_date, 'version': manifest['etag']}, selected_date
+
+    # Parsing is reported as the first 90%, aggregation as the rest
+    df = load_data(selected_date, progress=lambda done, total: set_progress((90 * done // total, 100)))
+    summary = summarize_day(df)
+    # The frame is already in memory, so leave the range-mode summary behind too
+    entry = catalog.get(selected_date)
+    if entry is not None:
+        stored = day_summary.read_summary(selected_date, entry) is not None
+        metrics.inc('dash_cache_requests_total', cache='day_summary', result='hit' if stored else 'miss')
+        if not stored:
+            day_summary.write_summary(selected_date, entry, day_summary.summarize_frame(df))
+    # The figures are fetched pre-serialized by the browser; the store only
+    # tells it which day (and version) is ready
+    parts = figure_parts(df, summary)
+    # A closed day is baked once the table view's row index for this version
+    # of the file is at hand; otherwise the table view bakes it when it has
+    # made one, and until then the figures are served from the cache
+    if is_closed_day(selected_date) and table_date == selected_date and row_index is not None \
+            and row_index.get('size') == version[2]:
+        tag = bake_snapshot(selected_date, parts=parts, row_index=row_index)['etag']
+    else:
+        store_figure_parts(selected_date, version, parts)
+        tag = f'{version[1]}-{version[2]}'
+    set_progress((100, 100))
+    return build_analysis_view(), {'date': selected_date, 'version': tag}, selected_date
+
+app.clientside_callback(
+    """
+    function(mode) {
+        return [
+            {'display': mode === 'day' ? 'block' : 'none'},
+            {'display': mode === 'range' ? 'block' : 'none'},
+            {'display': mode === 'live' ? 'block' : 'none'},
+            mode !== 'live'
+        ];
+    }
+    """,
+    [Output('day-mode', 'style'),
+     Output('range-mode', 'style'),
+     Output('live-mode', 'style'),
+     Output('live-interval', 'disabled')],
+    Input('mode-selector', 'value')
+)
+
+# Range mode only reads the per-day summaries; days without an up-to-date
+# summary are summarized in parallel first, which is what the progress bar
+# tracks.
+@app.callback(
+    Output('range-summaries', 'data'),
+    [Input('mode-selector', 'value'),
+     Input('range-picker', 'start_date'),
+     Input('range-picker', 'end_date')],
+    State('range-summaries', 'data'),
+    background=True,
+    progress=[Output('range-view-progress', 'value'),
+              Output('range-view-progress', 'max')],
+    running=[(Output('range-view-loading', 'style'), {'display': 'block'}, {'display': 'none'})],
+    prevent_initial_call=True
+)
+@metrics.flush_after
+@profiling.profiled
+def update_range_summaries(set_progress, mode, start_date, end_date, current):
+    if mode != 'range' or not start_date or not end_date:
+        raise PreventUpdate
+    if current and current['start'] == start_date and current['end'] == end_date:
+        raise PreventUpdate
+
+    days = [day for day in catalog.dates() if start_date <= day <= end_date]
+    summaries = day_summary.load_summaries(catalog, days, progress=lambda done, total: set_progress((done, total)))
+    return {'start': start_date, 'end': end_date, 'days': summaries}
+
+@app.callback(
+    [Output('range-trend-graph', 'figure'),
+     Output('range-histogram-graph', 'figure')],
+    [Input('range-metric-dropdown', 'value'),
+     Input('range-summaries', 'data')]
+)
+@profiling.profiled
+def update_range_figures(selected_metric, data):
+    days = {day: summary['metrics'].get(selected_metric) for day, summary in (data or {}).get('days', {}).items()}
+    days = {day: stats for day, stats in days.items() if stats}
+
+    trend = go.Figure()
+    for name in day_summary.PERCENTILES:
+        trend.add_trace(go.Scatter(x=list(days), y=[stats[name] for stats in days.values()], mode='lines+markers', name=name))
+    trend.update_layout(
+        title=dict(text=f'{selected_metric} Percentiles per Day', font=dict(size=22)),
+        xaxis_title='Date',
+        yaxis_title='Latency (ns)',
+        yaxis_type='log',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=100, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+
+    edges = day_summary.HISTOGRAM_EDGES
+    centers = np.sqrt(edges[:-1] * edges[1:])
+    colors = px.colors.sample_colorscale('Viridis', [i / max(len(days) - 1, 1) for i in range(len(days))])
+    overlay = go.Figure()
+    for (day, stats), color in zip(days.items(), colors):
+        counts = np.asarray(stats['histogram'])
+        used = np.flatnonzero(counts)
+        if len(used) == 0:
+            continue
+        # Trim empty bins at both ends so the x axis covers only real data
+        window = slice(used[0], used[-1] + 1)
+        overlay.add_trace(go.Scatter(x=centers[window], y=counts[window] / counts.sum(), mode='lines', name=day, line=dict(color=color)))
+    overlay.update_layout(
+        title=dict(text=f'{selected_metric} Latency Distribution by Day', font=dict(size=22)),
+        xaxis_title='Latency (ns)',
+        yaxis_title='Fraction of Events',
+        xaxis_type='log',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=100, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    for fig in (trend, overlay):
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
+
+    return trend, overlay
+
+# Live mode follows today's file. Each poll parses only the rows appended since
+# the previous one and sends Patch updates: new bars are appended to the T2
+# chart and only the histogram counts are replaced, so the cost of a poll does
+# not grow as the day goes on. Running totals are kept in live-state, which is
+# only sent back when a poll changed it. A view opened late in the day starts
+# a backfill's worth of bytes before the end of the file; the time of its
+# first row is then kept as view_start and shown, so the totals are never
+# mistaken for the whole day's.
+def new_live_state(day, filename):
+    header, offset, skipped, mark = live.tail_start(filename)
+    return {
+        'date': day,
+        'header': header,
+        'offset': offset,
+        'mark': mark,
+        'skipped': skipped,
+        'view_start': None,
+        'rows': 0,
+        'points': 0,
+        'last_second': None,
+        'last_count': 0,
+        'histograms': {metric: [0] * (len(day_summary.HISTOGRAM_EDGES) - 1) for metric in latency_metrics},
+        'detector': None,
+        'open_second': None,
+    }
+
+# Feeds the seconds completed by this poll's rows to the incident detector.
+# The latest second may still be receiving rows, so its row count and
+# per-stage maximum are kept in the state and merged with the next poll's.
+# Returns True if there are new incidents.
+def feed_live_detector(state, rows):
+    t2 = pd.to_datetime(rows['T2'], errors='coerce')
+    frame = pd.DataFrame({metric: pd.to_numeric(rows[metric], errors='coerce') for metric in latency_metrics if metric in rows.columns})
+    stages = list(frame.columns)
+    frame['second'] = t2.dt.floor('s').astype('int64') // 1_000_000_000
+    frame = frame[t2.notna()]
+    if frame.empty:
+        return False
+    grouped = frame.groupby('second')
+    seconds = grouped[stages].max()
+    seconds['rows'] = grouped.size()
+
+    open_second = state['open_second']
+    if open_second is not None:
+        carried = pd.DataFrame({**{stage: np.nan if value is None else value for stage, value in open_second['max'].items()},
+                                'rows': open_second['rows']}, index=[open_second['second']])
+        seconds = pd.concat([carried, seconds]).groupby(level=0).agg({**{stage: 'max' for stage in stages}, 'rows': 'sum'})
+    last = seconds.index[-1]
+    state['open_second'] = {'second': int(last), 'rows': int(seconds.at[last, 'rows']),
+                            'max': {stage: None if pd.isna(seconds.at[last, stage]) else float(seconds.at[last, stage]) for stage in stages}}
+    complete = seconds.iloc[:-1]
+
+    detector = anomalies.IncidentDetector(state['detector'])
+    reported = len(detector.incidents)
+    total = detector.update(complete.index.to_numpy(), complete['rows'].to_numpy(),
+                            {stage: complete[stage].to_numpy(dtype='float64') for stage in stages})
+    state['detector'] = detector.to_state()
+    return total > reported
+
+def build_live_t2_figure(seconds, counts):
+    fig = go.Figure(go.Bar(x=seconds, y=counts, marker_color='#3498db'))
+    fig.update_layout(
+        xaxis_title='T2 Timestamp',
+        yaxis_title='Number of Records',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=30, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+def live_histogram_range(counts):
+    used = np.flatnonzero(counts)
+    if len(used) == 0:
+        return None
+    edges = day_summary.HISTOGRAM_EDGES
+    return [float(np.log10(edges[used[0]])), float(np.log10(edges[used[-1] + 1]))]
+
+def live_latency_title(selected_metric, view_start):
+    since = f' since {view_start}' if view_start else ''
+    return f'{selected_metric} Latency Distribution{since}'
+
+def build_live_latency_figure(selected_metric, counts, view_start=None):
+    edges = day_summary.HISTOGRAM_EDGES
+    fig = go.Figure(go.Bar(x=np.sqrt(edges[:-1] * edges[1:]), y=counts, width=np.diff(edges), marker_color='#e74c3c'))
+    fig.update_layout(
+        title=dict(text=live_latency_title(selected_metric, view_start), font=dict(size=22)),
+        xaxis=dict(title='Latency (ns)', type='log', range=live_histogram_range(counts)),
+        yaxis_title='Frequency',
+        bargap=0,
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=100, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+@app.callback(
+    [Output('live-t2-graph', 'figure'),
+     Output('live-latency-graph', 'figure'),
+     Output('live-state', 'data'),
+     Output('live-status', 'children'),
+     Output('live-incident-table', 'data')],
+    [Input('live-interval', 'n_intervals'),
+     Input('live-metric-dropdown', 'value')],
+    State('live-state', 'data'),
+    prevent_initial_call=True
+)
+@profiling.profiled
+def update_live(n_intervals, selected_metric, state):
+    today = datetime.now().strftime("%Y-%m-%d")
+    version = data_version(today)
+    if version is None:
+        return no_update, no_update, None, f"Waiting for data for {today}...", no_update
+
+    redraw = state is None or state['date'] != today
+    if redraw:
+        state = new_live_state(today, version[0])
+
+    rows, offset, mark = live.read_appended(version[0], state['header'], state['offset'], state['mark'])
+    if offset is None:
+        # The file was replaced; start over from its new tail on the next poll
+        return no_update, no_update, None, "Data file was replaced, restarting...", no_update
+    state['offset'], state['mark'] = offset, mark
+    state['rows'] += len(rows)
+
+    seconds, counts = [], []
+    new_incidents = False
+    started = False
+    if not rows.empty:
+        new_incidents = feed_live_detector(state, rows)
+        t2 = pd.to_datetime(rows['T2'], errors='coerce')
+        if state['skipped'] and state['view_start'] is None and t2.notna().any():
+            state['view_start'] = t2.min().strftime('%H:%M:%S')
+            started = True
+        t2_counts = t2.dt.floor('s').value_counts().sort_index()
+        seconds = t2_counts.index.strftime('%Y-%m-%d %H:%M:%S').tolist()
+        counts = t2_counts.values.tolist()
+        for metric in latency_metrics:
+            if metric in rows.columns:
+                values = pd.to_numeric(rows[metric], errors='coerce').dropna().to_numpy(dtype='float64')
+                state['histograms'][metric] = (np.asarray(state['histograms'][metric]) + day_summary.log_histogram(values)).tolist()
+    if state['view_start'] is not None:
+        status = f"View starts at {state['view_start']} (earlier rows of today are not included): {state['rows']:,} rows received"
+    else:
+        status = f"{state['rows']:,} rows received"
+    status += f", last poll {datetime.now().strftime('%H:%M:%S')}"
+    histogram = state['histograms'][selected_metric]
+
+    if redraw:
+        t2_figure = build_live_t2_figure(seconds, counts)
+    elif seconds:
+        t2_figure = Patch()
+        # The first second of this batch may continue the chart's last bar
+        if seconds[0] == state['last_second']:
+            t2_figure['data'][0]['y'][state['points'] - 1] = state['last_count'] + counts[0]
+            counts[0] += state['last_count']
+            t2_figure['data'][0]['x'].extend(seconds[1:])
+            t2_figure['data'][0]['y'].extend(counts[1:])
+            state['points'] += len(seconds) - 1
+        else:
+            t2_figure['data'][0]['x'].extend(seconds)
+            t2_figure['data'][0]['y'].extend(counts)
+            state['points'] += len(seconds)
+    else:
+        t2_figure = no_update
+    if redraw:
+        state['points'] = len(seconds)
+    if seconds:
+        state['last_second'], state['last_count'] = seconds[-1], counts[-1]
+
+    if redraw or ctx.triggered_id == 'live-metric-dropdown':
+        latency_figure = build_live_latency_figure(selected_metric, histogram, state['view_start'])
+    elif seconds:
+        latency_figure = Patch()
+        latency_figure['data'][0]['y'] = histogram
+        latency_figure['layout']['xaxis']['range'] = live_histogram_range(histogram)
+        if started:
+            latency_figure['layout']['title']['text'] = live_latency_title(selected_metric, state['view_start'])
+    else:
+        latency_figure = no_update
+
+    incidents = anomalies.IncidentDetector(state['detector']).incidents
+    if redraw or new_incidents:
+        incident_rows = anomalies.incident_frame(incidents).to_dict('records')
+    else:
+        incident_rows = no_update
+    status += f", {len(incidents)} incidents"
+
+    # A poll with no new complete rows leaves the state as it was
+    if not redraw and rows.empty:
+        state = no_update
+    return t2_figure, latency_figure, state, status, incident_rows
+
+def page_records(selected_date, row_index, columns, page_current, page_size):
+    version = data_version(selected_date)
+    if version is None or not row_index:
+        return []
+    page = read_rows(version[0], row_index, page_current * page_size, page_size)
+    if page.empty:
+        return []
+    return prepare_frame(page)[columns].to_dict('records')
+
+@app.callback(
+    Output('table1', 'data'),
+    [Input('table1', 'page_current'),
+     Input('table1', 'page_size')],
+    [State('table-view-date', 'data'),
+     State('table-view-index', 'data')]
+)
+@profiling.profiled
+def update_table1_page(page_current, page_size, selected_date, row_index):
+    return page_records(selected_date, row_index, TABLE1_COLUMNS, page_current, page_size)
+
+@app.callback(
+    Output('table2', 'data'),
+    [Input('table2', 'page_current'),
+     Input('table2', 'page_size')],
+    [State('table-view-date', 'data'),
+     State('table-view-index', 'data')]
+)
+@profiling.profiled
+def update_table2_page(page_current, page_size, selected_date, row_index):
+    return page_records(selected_date, row_index, TABLE2_COLUMNS, page_current, page_size)
+
+
+# Instrument leaderboard and drill-down. Ranking or entering an id requests
+# the day's instrument index, which a background job builds the first time;
+# after that both are answered from the memory-mapped index by regular
+# callbacks.
+app.clientside_callback(
+    """
+    function(instrument, rankClicks, heatmapClicks, scatterClicks, throughputClicks, selectedDate, indexDate) {
+        const wanted = (instrument !== null && instrument !== undefined) || rankClicks > 0 || heatmapClicks > 0
+            || scatterClicks > 0 || throughputClicks > 0;
+        if (!wanted || indexDate === selectedDate) {
+            return window.dash_clientside.no_update;
+        }
+        return selectedDate;
+    }
+    """,
+    Output('instrument-index-request', 'data'),
+    [Input('drilldown-instrument', 'value'),
+     Input('leaderboard-button', 'n_clicks'),
+     Input('heatmap-button', 'n_clicks'),
+     Input('scatter-button', 'n_clicks'),
+     Input('throughput-button', 'n_clicks'),
+     Input('date-picker', 'date')],
+    State('instrument-index-date', 'data')
+)
+
+@app.callback(
+    Output('instrument-index-date', 'data'),
+    Input('instrument-index-request', 'data'),
+    background=True,
+    progress=[Output('instrument-index-progress', 'value'),
+              Output('instrument-index-progress', 'max')],
+    running=[(Output('instrument-index-loading', 'style'), {'display': 'block'}, {'display': 'none'})],
+    cancel=[Input('date-picker', 'date')],
+    prevent_initial_call=True
+)
+@metrics.flush_after
+@profiling.profiled
+def update_instrument_index(set_progress, selected_date):
+    version = data_version(selected_date)
+    if version is not None:
+        load_instrument_index(version, lambda done, total: set_progress((done, total)))
+    return selected_date
+
+def minute_label(minute):
+    return f'{minute // 60:02d}:{minute % 60:02d}'
+
+# The leaderboard window is in minutes since midnight, bounded by the day's
+# T2 range from the catalog
+@app.callback(
+    [Output('leaderboard-window', 'min'),
+     Output('leaderboard-window', 'max'),
+     Output('leaderboard-window', 'value'),
+     Output('leaderboard-window', 'marks')],
+    Input('date-picker', 'date')
+)
+@profiling.profiled
+def update_leaderboard_window(selected_date):
+    entry = catalog.get(selected_date) or {}
+    if entry.get('t2_min') and entry.get('t2_max'):
+        t2_min, t2_max = pd.Timestamp(entry['t2_min']), pd.Timestamp(entry['t2_max'])
+        low, high = t2_min.hour * 60 + t2_min.minute, t2_max.hour * 60 + t2_max.minute + 1
+    else:
+        low, high = 0, 24 * 60
+    marks = {minute: minute_label(minute) for minute in range(math.ceil(low / 60) * 60, high + 1, 60)}
+    return low, high, [low, high], marks
+
+# Count, mean and p99 of a stage per instrument over a window of the day,
+# cached per file version, column, metric and window; which statistic to
+# rank by and how many to show are decided afterwards
+def leaderboard_stats(version, selected_date, column, metric, window):
+    start, end = window
+    def compute():
+        index = load_instrument_index(version)
+        t2 = index.events['T2'].to_numpy()
+        midnight = np.datetime64(selected_date)
+        mask = (t2 >= midnight + np.timedelta64(start, 'm')) & (t2 < midnight + np.timedelta64(end, 'm'))
+        return pa.Table.from_pandas(index.group_stats(column, metric, mask), preserve_index=False)
+    return arrow_cache.table(f'{selected_date}.leaderboard', (version[2], version[1], column, metric, start, end), compute).to_pandas()
+
+@app.callback(
+    [Output('leaderboard-table', 'data'),
+     Output('leaderboard-status', 'children')],
+    [Input('leaderboard-button', 'n_clicks'),
+     Input('leaderboard-column', 'value'),
+     Input('leaderboard-metric', 'value'),
+     Input('leaderboard-stat', 'value'),
+     Input('leaderboard-window', 'value'),
+     Input('instrument-index-date', 'data')],
+    State('date-picker', 'date')
+)
+@profiling.profiled
+def update_leaderboard(n_clicks, column, metric, stat, window, index_date, selected_date):
+    if not n_clicks:
+        raise PreventUpdate
+    version = data_version(selected_date)
+    if version is None:
+        return [], "No data available for the selected date."
+    if index_date != selected_date:
+        raise PreventUpdate
+
+    stats = leaderboard_stats(version, selected_date, column, metric, window)
+    eligible = stats[stats['events'] >= LEADERBOARD_MIN_EVENTS]
+    ranked = eligible.nlargest(LEADERBOARD_TOP_N, stat).round({'mean': 0, 'p99': 0})
+    ranked.insert(0, 'rank', range(1, len(ranked) + 1))
+    kind = 'options' if column == 'OptionEMMId' else 'underlyings'
+    status = (f"Top {len(ranked)} of {len(eligible):,} {kind} with at least {LEADERBOARD_MIN_EVENTS} events "
+              f"between {minute_label(window[0])} and {minute_label(window[1])}, by {stat} {metric}. "
+              "Click a row to drill down.")
+    return ranked.to_dict('records'), status
+
+@app.callback(
+    [Output('drilldown-instrument', 'value'),
+     Output('drilldown-column', 'value')],
+    Input('leaderboard-table', 'active_cell'),
+    [State('leaderboard-table', 'data'),
+     State('leaderboard-column', 'value')],
+    prevent_initial_call=True
+)
+@profiling.profiled
+def select_leaderboard_instrument(active_cell, rows, column):
+    if not active_cell or not rows:
+        raise PreventUpdate
+    return rows[active_cell['row']]['id'], column
+
+# p99 T5-T2 per time bucket for the busiest underlyings, cached per file
+# version, bucket size and K as a long table of cells in (id, bucket) order
+def heatmap_grid(version, selected_date, bucket, top_k):
+    def compute():
+        ids, starts, counts, p99 = load_instrument_index(version).time_grid('UnderlyingEMMId', HEATMAP_METRIC, bucket, top_k)
+        return pa.table({'id': np.repeat(ids, len(starts)), 'start': np.tile(starts, len(ids)),
+                         'events': counts.ravel(), 'p99': p99.ravel()},
+                        metadata={'buckets': str(len(starts))})
+    table = arrow_cache.table(f'{selected_date}.heatmap', (version[2], version[1], HEATMAP_METRIC, bucket, top_k), compute)
+    n_buckets = table_metadata(table, 'buckets') or 0
+    shape = (len(table) // n_buckets, n_buckets) if n_buckets else (0, 0)
+    return (table['id'].to_numpy()[::n_buckets] if n_buckets else np.array([]), table['start'].to_numpy()[:n_buckets],
+            table['events'].to_numpy().reshape(shape), table['p99'].to_numpy().reshape(shape))
+
+def build_heatmap_figure(ids, starts, counts, p99, bucket):
+    fig = go.Figure(go.Heatmap(
+        z=p99,
+        x=pd.DatetimeIndex(starts).strftime('%H:%M'),
+        y=[str(instrument) for instrument in ids],
+        customdata=counts,
+        colorscale='Viridis',
+        colorbar=dict(title='p99 (ns)'),
+        hovertemplate='Underlying %{y}<br>%{x}<br>p99 %{z:,.0f} ns<br>%{customdata:,} events<extra></extra>',
+    ))
+    fig.update_layout(
+        title=dict(text=f'p99 {HEATMAP_METRIC} per {bucket} by Underlying (busiest first)', font=dict(size=20)),
+        xaxis_title='T2',
+        yaxis_title='UnderlyingEMMId',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=80, b=50),
+        height=max(400, 22 * len(ids) + 160),
+    )
+    fig.update_yaxes(type='category', autorange='reversed')
+    fig.update_xaxes(type='category', nticks=24)
+    return fig
+
+@app.callback(
+    [Output('heatmap-graph', 'figure'),
+     Output('heatmap-graph', 'style')],
+    [Input('heatmap-button', 'n_clicks'),
+     Input('heatmap-bucket', 'value'),
+     Input('heatmap-top-k', 'value'),
+     Input('instrument-index-date', 'data')],
+    State('date-picker', 'date')
+)
+@profiling.profiled
+def update_heatmap(n_clicks, bucket, top_k, index_date, selected_date):
+    if not n_clicks:
+        raise PreventUpdate
+    version = data_version(selected_date)
+    if version is None:
+        return {}, {'display': 'none'}
+    if index_date != selected_date:
+        raise PreventUpdate
+    return build_heatmap_figure(*heatmap_grid(version, selected_date, bucket, top_k), bucket), {'display': 'block'}
+
+# Every event's T2 (ns) and latency sorted by T2, without events missing
+# either, cached per file version so zooming only ever slices it
+def t2_sorted(version, selected_date):
+    def compute():
+        events = load_instrument_index(version).events
+        t2 = events['T2'].to_numpy().view(np.int64)
+        values = events[SCATTER_METRIC].to_numpy()
+        order = np.argsort(t2, kind='stable')
+        order = order[~np.isnan(values[order])]
+        return pa.table({'t2': t2[order], 'latency': values[order]})
+    table = arrow_cache.table(f'{selected_date}.t2-sorted', (version[2], version[1], SCATTER_METRIC), compute)
+    return table['t2'].to_numpy(), table['latency'].to_numpy()
+
+# The scatter's view after a zoom, pan or reset: x as T2 ns and y as log10
+# latency, None for the whole axis. Returns None if the axes did not change.
+def scatter_view(view, relayout):
+    view = dict(view or {'x': None, 'y': None})
+    changed = False
+    for axis in ['x', 'y']:
+        if relayout.get(f'{axis}axis.autorange'):
+            view[axis], changed = None, True
+        elif f'{axis}axis.range[0]' in relayout or f'{axis}axis.range' in relayout:
+            low, high = relayout.get(f'{axis}axis.range') or (relayout[f'{axis}axis.range[0]'], relayout[f'{axis}axis.range[1]'])
+            view[axis] = [pd.Timestamp(low).value, pd.Timestamp(high).value] if axis == 'x' else [float(low), float(high)]
+            changed = True
+    return view if changed else None
+
+# Times are sent as float epoch ms like the percentile series; the view is
+# kept across redraws (uirevision) so the figure can be replaced on zoom
+def build_scatter_figure(t2, values, view):
+    fig = go.Figure(go.Scattergl(
+        x=(t2 // 1_000_000).astype('float64'), y=values.astype('float32'), mode='markers',
+        marker=dict(size=3, opacity=0.6), name=SCATTER_METRIC,
+        hovertemplate='%{x|%H:%M:%S.%L}<br>%{y:,.0f} ns<extra></extra>'))
+    fig.update_layout(
+        xaxis_title='T2',
+        yaxis_title=f'{SCATTER_METRIC} (ns)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=30, b=50),
+        uirevision=view['date'],
+    )
+    fig.update_xaxes(type='date', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_yaxes(type='log', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    return fig
+
+@app.callback(
+    [Output('scatter-graph', 'figure'),
+     Output('scatter-graph', 'style'),
+     Output('scatter-status', 'children'),
+     Output('scatter-view', 'data')],
+    [Input('scatter-button', 'n_clicks'),
+     Input('scatter-graph', 'relayoutData'),
+     Input('instrument-index-date', 'data')],
+    [State('scatter-view', 'data'),
+     State('date-picker', 'date')]
+)
+@profiling.profiled
+def update_scatter(n_clicks, relayout, index_date, view, selected_date):
+    if not n_clicks:
+        raise PreventUpdate
+    version = data_version(selected_date)
+    if version is None:
+        return {}, {'display': 'none'}, "No data available for the selected date.", None
+    if index_date != selected_date:
+        raise PreventUpdate
+    if ctx.triggered_id == 'scatter-graph':
+        if not relayout or not view or view.get('date') != selected_date:
+            raise PreventUpdate
+        view = scatter_view(view, relayout)
+        if view is None:
+            raise PreventUpdate
+    else:
+        view = {'date': selected_date, 'x': None, 'y': None}
+
+    t2, values = t2_sorted(version, selected_date)
+    if len(t2) == 0:
+        return {}, {'display': 'none'}, "No events with a T2 and latency.", view
+    x0, x1 = view['x'] or (t2[0], t2[-1] + 1)
+    shown = decimation.decimate(t2, values, x0, x1, view['y'])
+    in_view = decimation.view_slice(t2, x0, x1)
+    total = in_view.stop - in_view.start
+    status = f"All {total:,} events in the time range."
+    if len(shown) < total:
+        status = (f"{len(shown):,} of {total:,} events in the time range: one per marker-sized cell, and the "
+                  "fastest and slowest of every column. Zoom in for more detail.")
+    return build_scatter_figure(t2[shown], values[shown], view), {'display': 'block'}, status, view
+
+# Sorted arrival (T2) or write (T5) times of every event of a day
+def stream_times(version, stream):
+    events = load_instrument_index(version).events
+    return throughput.event_times(events['T2'].to_numpy(), events['T5-T2'].to_numpy() if stream == 'T5' else None)
+
+# The gaps worth showing of a stream (see throughput.gap_windows), with its
+# gap and burst summary in the metadata, cached per file version
+def throughput_gaps(version, selected_date, stream):
+    def compute():
+        times = stream_times(version, stream)
+        starts, ends = throughput.gap_windows(times)
+        summary = {**throughput.gap_summary(times), 'bursts': throughput.burst_summary(times)}
+        return pa.table({'start': starts, 'end': ends}, metadata={'summary': orjson.dumps(summary)})
+    table = arrow_cache.table(f'{selected_date}.throughput-gaps', (version[2], version[1], stream), compute)
+    return table_metadata(table, 'summary'), table.to_pandas()
+
+# Events and busiest window of each size per second of a stream, cached per
+# file version
+def throughput_rates(version, selected_date, stream):
+    def compute():
+        seconds, events, peaks = throughput.per_second_peaks(stream_times(version, stream))
+        return pa.table({'second': seconds, 'events': events, **peaks})
+    return arrow_cache.table(f'{selected_date}.throughput-rates', (version[2], version[1], stream), compute)
+
+def ns_label(ns):
+    return pd.Timestamp(ns).strftime('%H:%M:%S.%f')
+
+# Events per second against the rate of the busiest window of each size
+# within that second, all in events per second, so sub-second bursts show
+# as peaks far above the per-second count
+def build_throughput_figure(rates, stream):
+    x = (rates['second'].to_numpy() // 1_000_000).astype('float64')
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=x, y=rates['events'].to_numpy().astype('float32'), mode='lines', name='Per second'))
+    for name, window in throughput.WINDOWS.items():
+        rate = rates[name].to_numpy() / window * throughput.NS_PER_SECOND
+        fig.add_trace(go.Scattergl(x=x, y=rate.astype('float32'), mode='lines', name=f'Busiest {name}', line=dict(width=1)))
+    fig.update_layout(
+        title=dict(text=f'{THROUGHPUT_STREAMS[stream]} per Second', font=dict(size=20)),
+        xaxis_title='Time',
+        yaxis_title='Events per second',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=80, b=50),
+        hovermode='x unified',
+    )
+    fig.update_xaxes(type='date', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_yaxes(type='log', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    return fig
+
+@app.callback(
+    [Output('throughput-graph', 'figure'),
+     Output('throughput-charts', 'style'),
+     Output('throughput-summary', 'children'),
+     Output('throughput-bursts', 'data'),
+     Output('throughput-stall-status', 'children'),
+     Output('throughput-stalls', 'data')],
+    [Input('throughput-button', 'n_clicks'),
+     Input('throughput-stream', 'value'),
+     Input('throughput-threshold', 'value'),
+     Input('instrument-index-date', 'data')],
+    State('date-picker', 'date')
+)
+@profiling.profiled
+def update_throughput(n_clicks, stream, threshold, index_date, selected_date):
+    if not n_clicks:
+        raise PreventUpdate
+    version = data_version(selected_date)
+    if version is None:
+        return {}, {'display': 'none'}, "No data available for the selected date.", [], "", []
+    if index_date != selected_date:
+        raise PreventUpdate
+
+    summary, gaps = throughput_gaps(version, selected_date, stream)
+    if summary['events'] < 2:
+        return {}, {'display': 'none'}, "Not enough events to analyze.", [], "", []
+    mean_rate = summary['mean_rate']
+    text = (f"{summary['events']:,} events from {ns_label(summary['first'])} to {ns_label(summary['last'])}, "
+            f"{mean_rate:,.1f} per second on average. Gaps between events: "
+            + ', '.join(f"{name} {summary[name] / 1e6:,.3f} ms" for name in throughput.GAP_PERCENTILES)
+            + f", longest {summary['max'] / 1e6:,.3f} ms.")
+    bursts = [{'window': name, 'start': ns_label(burst['start']), 'events': burst['events'],
+               'rate': round(burst['rate']), 'ratio': round(burst['rate'] / mean_rate, 1) if mean_rate else None}
+              for name, burst in summary['bursts'].items()]
+
+    starts, ends = gaps['start'].to_numpy(), gaps['end'].to_numpy()
+    lengths = ends - starts
+    stalls = np.flatnonzero(lengths >= threshold)
+    if len(stalls):
+        stall_status = (f"{len(stalls):,} stalls of at least {threshold / 1e6:,.0f} ms, "
+                        f"{lengths[stalls].sum() / 1e9:,.1f} s in total. Longest first"
+                        + (f", the top {THROUGHPUT_MAX_STALLS:,} shown." if len(stalls) > THROUGHPUT_MAX_STALLS else "."))
+    else:
+        stall_status = f"No stalls of at least {threshold / 1e6:,.0f} ms. The longest gaps were:"
+        stalls = np.argsort(-lengths, kind='stable')[:throughput.TOP_GAPS]
+    stalls = stalls[np.argsort(-lengths[stalls], kind='stable')][:THROUGHPUT_MAX_STALLS]
+    stall_rows = [{'start': ns_label(starts[i]), 'end': ns_label(ends[i]), 'gap': round(lengths[i] / 1e6, 3)} for i in stalls]
+    figure = build_throughput_figure(throughput_rates(version, selected_date, stream), stream)
+    return figure, {'display': 'flex', 'flexWrap': 'wrap'}, text, bursts, stall_status, stall_rows
+
+# Highest and mean number of events inside each hop per second (see
+# throughput.queue_depth_series), cached per file version
+def queue_depth_table(version, selected_date):
+    def compute():
+        events = load_instrument_index(version).events
+        latencies = {column: events[column].to_numpy() for column in latency_metrics if column in events.column_names}
+        seconds, series = throughput.queue_depth_series(events['T2'].to_numpy(), latencies)
+        return pa.table({'second': seconds, **series})
+    return arrow_cache.table(f'{selected_date}.queue-depth', (version[2], version[1]), compute)
+
+def build_queue_figure(table, stat):
+    x = (table['second'].to_numpy() // 1_000_000).astype('float64')
+    fig = go.Figure()
+    for hop, (entry, exit) in throughput.QUEUE_HOPS.items():
+        if f'{hop}-{stat}' in table.column_names:
+            fig.add_trace(go.Scattergl(x=x, y=table[f'{hop}-{stat}'].to_numpy().astype('float32'), mode='lines',
+                                       name=f'{entry} to {exit}', line=dict(width=1)))
+    fig.update_layout(
+        title=dict(text=f"{'Peak' if stat == 'max' else 'Mean'} Events in Flight per Second", font=dict(size=20)),
+        xaxis_title='Time',
+        yaxis_title='Events in flight',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=80, b=50),
+        hovermode='x unified',
+    )
+    fig.update_xaxes(type='date', showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    return fig
+
+@app.callback(
+    Output('queue-graph', 'figure'),
+    [Input('throughput-button', 'n_clicks'),
+     Input('queue-stat', 'value'),
+     Input('instrument-index-date', 'data')],
+    State('date-picker', 'date')
+)
+@profiling.profiled
+def update_queue_depth(n_clicks, stat, index_date, selected_date):
+    if not n_clicks:
+        raise PreventUpdate
+    version = data_version(selected_date)
+    if version is None:
+        return {}
+    if index_date != selected_date:
+        raise PreventUpdate
+    return build_queue_figure(queue_depth_table(version, selected_date), stat)
+
+def build_drilldown_figure(events, title):
+    step = max(1, math.ceil(len(events) / DRILLDOWN_MAX_POINTS))
+    shown = events.iloc[::step]
+    fig = go.Figure()
+    for metric in ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']:
+        if metric in shown.columns:
+            fig.add_trace(go.Scattergl(x=shown['T2'], y=shown[metric], mode='markers', marker=dict(size=4), name=metric))
+    fig.update_layout(
+        title=dict(text=title if step == 1 else f'{title} (every {step}th event)', font=dict(size=20)),
+        xaxis_title='T2',
+        yaxis_title='Latency (ns)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14),
+        margin=dict(l=50, r=50, t=80, b=50),
+    )
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgrey', type='log')
+    return fig
+
+def drilldown_summary(events, label):
+    types = events['Insert/Update'].value_counts() if 'Insert/Update' in events.columns else pd.Series(dtype='int64')
+    parts = [f"{label}: {len(events):,} events ({types.get('I', 0):,} inserts, {types.get('U', 0):,} updates)",
+             f"T2 {events['T2'].min():%H:%M:%S.%f} to {events['T2'].max():%H:%M:%S.%f}"]
+    if 'T5-T2' in events.columns and events['T5-T2'].notna().any():
+        p50, p99 = events['T5-T2'].quantile([0.5, 0.99])
+        parts.append(f"T5-T2 p50 {p50:,.0f} ns, p99 {p99:,.0f} ns")
+    return ', '.join(parts)
+
+@app.callback(
+    [Output('drilldown-summary', 'children'),
+     Output('drilldown-graph', 'figure'),
+     Output('drilldown-content', 'style'),
+     Output('drilldown-table', 'page_count'),
+     Output('drilldown-table', 'page_current'),
+     Output('drilldown-selection', 'data')],
+    [Input('drilldown-instrument', 'value'),
+     Input('drilldown-column', 'value'),
+     Input('instrument-index-date', 'data')],
+    State('date-picker', 'date')
+)
+@profiling.profiled
+def update_drilldown(instrument, column, index_date, selected_date):
+    hidden = {'display': 'none'}
+    if instrument is None:
+        return "", no_update, hidden, 1, 0, None
+    version = data_version(selected_date)
+    if version is None:
+        return "No data available for the selected date.", no_update, hidden, 1, 0, None
+    if index_date != selected_date:
+        # The index job is running and triggers this again when it is done
+        raise PreventUpdate
+
+    label = f"{'Option' if column == 'OptionEMMId' else 'Underlying'} {instrument}"
+    events = load_instrument_index(version).lookup(column, instrument)
+    if events.empty:
+        return f"{label}: no events on {selected_date}.", no_update, hidden, 1, 0, None
+    return (drilldown_summary(events, label), build_drilldown_figure(events, label), {'display': 'block'},
+            math.ceil(len(events) / DRILLDOWN_PAGE_SIZE), 0,
+            {'date': selected_date, 'column': column, 'instrument': instrument})
+
+@app.callback(
+    Output('drilldown-table', 'data'),
+    [Input('drilldown-table', 'page_current'),
+     Input('drilldown-selection', 'data')]
+)
+@profiling.profiled
+def update_drilldown_page(page_current, selection):
+    version = data_version(selection['date']) if selection else None
+    if version is None:
+        return []
+    index = load_instrument_index(version)
+    rows = index.rows(selection['column'], selection['instrument'])
+    start = (page_current or 0) * DRILLDOWN_PAGE_SIZE
+    page = index.events.take(pa.array(rows[start:start + DRILLDOWN_PAGE_SIZE])).to_pandas()
+    page['T2_formatted'] = page['T2'].dt.strftime('%H:%M:%S.%f')
+    return page.drop(columns=['T2']).to_dict('records')
+
+# The analysis figures are fetched as stored JSON from /figures, so changing
+# the dropdowns costs neither figure building nor serialization
+app.clientside_callback(
+    """
+    async function(summary) {
+        if (!summary) {
+            return {};
+        }
+        const response = await fetch(`/figures/${summary.date}/t2?v=${summary.version}`);
+        return response.ok ? await response.json() : {};
+    }
+    """,
+    Output('t2-histogram-graph', 'figure'),
+    Input('analysis-summary', 'data')
+)
+
+app.clientside_callback(
+    """
+    async function(selected_metric, summary) {
+        if (!summary || !selected_metric) {
+            return [{}, []];
+        }
+        const response = await fetch(`/figures/${summary.date}/latency-${selected_metric}?v=${summary.version}`);
+        const card = response.ok ? await response.json() : null;
+        return card ? [card.figure, card.stats] : [{}, []];
+    }
+    """,
+    [Output('latency-histogram-graph', 'figure'),
+     Output('latency-histogram-stats', 'children')],
+    [Input('latency-dropdown', 'value'),
+     Input('analysis-summary', 'data')]
+)
+
+app.clientside_callback(
+    """
+    async function(summary) {
+        if (!summary) {
+            return [];
+        }
+        const response = await fetch(`/figures/${summary.date}/incidents?v=${summary.version}`);
+        const incidents = response.ok ? await response.json() : null;
+        return incidents || [];
+    }
+    """,
+    Output('incident-table', 'data'),
+    Input('analysis-summary', 'data')
+)
+
+app.clientside_callback(
+    """
+    async function(selected_metric, resolution, summary) {
+        if (!summary || !selected_metric || !resolution) {
+            return {};
+        }
+        const response = await fetch(`/figures/${summary.date}/series-${resolution}-${selected_metric}?v=${summary.version}`);
+        const figure = response.ok ? await response.json() : null;
+        return figure || {};
+    }
+    """,
+    Output('series-graph', 'figure'),
+    [Input('series-metric-dropdown', 'value'),
+     Input('series-resolution', 'value'),
+     Input('analysis-summary', 'data')]
+)
+
+app.clientside_callback(
+    """
+    async function(stat, resolution, summary) {
+        if (!summary || !stat || !resolution) {
+            return {};
+        }
+        const response = await fetch(`/figures/${summary.date}/stages-${resolution}-${stat}?v=${summary.version}`);
+        const figure = response.ok ? await response.json() : null;
+        return figure || {};
+    }
+    """,
+    Output('stage-graph', 'figure'),
+    [Input('stage-stat', 'value'),
+     Input('stage-resolution', 'value'),
+     Input('analysis-summary', 'data')]
+)
+
+app.clientside_callback(
+    """
+    async function(selected_type, selected_metric, summary) {
+        if (!summary || !selected_type || !selected_metric) {
+            return [{}, []];
+        }
+        const response = await fetch(`/figures/${summary.date}/insert-update-${selected_type}-${selected_metric}?v=${summary.version}`);
+        const card = response.ok ? await response.json() : null;
+        return card ? [card.figure, card.stats] : [{}, []];
+    }
+    """,
+    [Output('insert-update-histogram-graph', 'figure'),
+     Output('insert-update-histogram-stats', 'children')],
+    [Input('insert-update-dropdown', 'value'),
+     Input('insert-update-metric-dropdown', 'value'),
+     Input('analysis-summary', 'data')]
+)
+
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    # python new_dashboard.py bake <date> [<date> ...] writes the snapshot
+    # bundles of closed days, e.g. from an end-of-day cron job
+    if len(sys.argv) > 2 and sys.argv[1] == 'bake':
+        for day in sys.argv[2:]:
+            manifest = bake_snapshot(day)
+            print(f"{day}: {'no data' if manifest is None else manifest['etag']}")
+    else:
+        app.run_server(debug=True)
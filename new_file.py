@@ -1,9 +1,9 @@
 import dash
 from dash import dcc, html, dash_table
 from dash.dependencies import Input, Output, State
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
-import plotly.express as px
 
 app = dash.Dash(__name__)
 
@@ -11,37 +11,58 @@ app = dash.Dash(__name__)
 df = pd.read_csv('data.csv')
 
 colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
+deltas = ['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2']
 
-bar_fig = go.Figure(data=[
-    go.Bar(name='T2-T1', x=df.index, y=df['T2-T1'], marker_color=colors[0]),
-    go.Bar(name='T3-T2', x=df.index, y=df['T3-T2'], marker_color=colors[1]),
-    go.Bar(name='T4-T3', x=df.index, y=df['T4-T3'], marker_color=colors[2]),
-    go.Bar(name='T5-T4', x=df.index, y=df['T5-T4'], marker_color=colors[3]),
-    go.Bar(name='T5-T2', x=df.index, y=df['T5-T2'], marker_color=colors[4])
-])
+# The rows are compared in at most BAR_BUCKETS runs of consecutive data
+# points rather than one bar per row, so the figures stay the same size
+# however long data.csv is. Every statistic is computed once at startup.
+BAR_BUCKETS = 100
+BAR_STATS = {'mean': 'Mean', 'p50': 'p50', 'p99': 'p99', 'max': 'Max'}
+HIST_BINS = 20
 
-bar_fig.update_layout(
-    title='Time Differences Comparison',
-    xaxis_title='Data Point',
-    yaxis_title='Time Difference',
-    barmode='group',
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-)
+bucket_size = max(1, -(-len(df) // BAR_BUCKETS))
+buckets = df[deltas].groupby(np.arange(len(df)) // bucket_size)
+bar_stats = {
+    'mean': buckets.mean(),
+    'p50': buckets.quantile(0.5),
+    'p99': buckets.quantile(0.99),
+    'max': buckets.max(),
+}
+bucket_labels = [f'{start}-{min(start + bucket_size, len(df)) - 1}' for start in bar_stats['mean'].index * bucket_size]
 
-hist_fig = px.histogram(
-    df, 
-    x=['T2-T1', 'T3-T2', 'T4-T3', 'T5-T4', 'T5-T2'], 
-    nbins=20, 
-    title='Distribution of Time Differences',
-    labels={'value': 'Time Difference', 'variable': 'Measurement'},
-    color_discrete_sequence=colors
-)
+def build_bar_figure(stat):
+    fig = go.Figure(data=[
+        go.Bar(name=delta, x=bucket_labels, y=bar_stats[stat][delta], marker_color=color)
+        for delta, color in zip(deltas, colors)
+    ])
+    fig.update_layout(
+        title=f'Time Differences Comparison ({BAR_STATS[stat]} per {bucket_size:,} Data Points)',
+        xaxis_title='Data Points',
+        yaxis_title='Time Difference',
+        barmode='group',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+# Binned here on shared edges over all deltas, which is what the express
+# histogram did in the browser from every raw value
+values = df[deltas].to_numpy(dtype='float64')
+finite = values[np.isfinite(values)]
+hist_edges = np.histogram_bin_edges(finite, bins=HIST_BINS) if len(finite) else np.linspace(0, 1, HIST_BINS + 1)
+hist_fig = go.Figure(data=[
+    go.Bar(name=delta, x=(hist_edges[:-1] + hist_edges[1:]) / 2, y=np.histogram(df[delta].dropna(), bins=hist_edges)[0],
+           width=np.diff(hist_edges) / len(deltas), marker_color=color)
+    for delta, color in zip(deltas, colors)
+])
 
 hist_fig.update_layout(
+    title='Distribution of Time Differences',
     xaxis_title='Time Difference',
     yaxis_title='Frequency',
+    barmode='group',
     bargap=0.2,
+    legend_title_text='Measurement',
     plot_bgcolor='rgba(0,0,0,0)',
     paper_bgcolor='rgba(0,0,0,0)',
 )
@@ -121,9 +142,24 @@ def toggle_content(n_clicks, current_content):
     else:
         return html.Div([
             html.H2("Time Difference Analysis", style={'color': '#34495e', 'textAlign': 'center'}),
-            dcc.Graph(figure=bar_fig),
+            dcc.RadioItems(
+                id='bar-stat',
+                options=[{'label': label, 'value': stat} for stat, label in BAR_STATS.items()],
+                value='mean',
+                inline=True,
+                style={'textAlign': 'center'}
+            ),
+            dcc.Graph(id='bar-graph', figure=build_bar_figure('mean')),
             dcc.Graph(figure=hist_fig)
         ], style={'margin': '20px', 'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'})
 
+@app.callback(
+    Output('bar-graph', 'figure'),
+    Input('bar-stat', 'value'),
+    prevent_initial_call=True
+)
+def update_bar_figure(stat):
+    return build_bar_figure(stat)
+
 if __name__ == '__main__':
     app.run_server(debug=True)
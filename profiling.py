@@ -0,0 +1,100 @@
+import cProfile
+import functools
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+import flask
+
+# Opt-in profiling of individual callbacks. DASH_PROFILE holds a comma
+# separated list of what to profile:
+#   DASH_PROFILE=update_dashboard,update_insert_update_histogram
+#       profile every call of the named callbacks ('all' for every one)
+#   DASH_PROFILE=query
+#       profile only requests from a page opened with ?profile=1 (every
+#       decorated callback) or ?profile=<name>,<name>
+# Each profiled call writes a .pstats file (for pstats/snakeviz) and a
+# .collapsed file of sampled stacks (for flamegraph.pl/speedscope) to
+# DASH_PROFILE_DIR. When DASH_PROFILE is unset, profiled() returns the
+# callback unchanged, so there is no overhead at all.
+
+PROFILE_TARGETS = {name.strip() for name in os.environ.get('DASH_PROFILE', '').split(',') if name.strip()}
+PROFILE_DIR = os.environ.get('DASH_PROFILE_DIR', './profiles')
+SAMPLE_INTERVAL = 0.001  # seconds
+
+
+# Samples the stack of one thread at a fixed interval and counts each
+# distinct stack, root first, in the collapsed format flame graph tools read
+class StackSampler:
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def requested_in_query(name):
+    if not flask.has_request_context() or not flask.request.referrer:
+        return False
+    values = parse_qs(urlparse(flask.request.referrer).query).get('profile', [])
+    names = {n.strip() for value in values for n in value.split(',')}
+    return bool(names & {'1', 'all', name})
+
+
+def should_profile(name):
+    if name in PROFILE_TARGETS or 'all' in PROFILE_TARGETS:
+        return True
+    return 'query' in PROFILE_TARGETS and requested_in_query(name)
+
+
+def profiled(func):
+    if not PROFILE_TARGETS:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not should_profile(func.__name__):
+            return func(*args, **kwargs)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f'{datetime.now():%Y%m%d-%H%M%S.%f}-{func.__name__}-{os.getpid()}')
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident())
+        try:
+            with sampler:
+                profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+        finally:
+            profiler.dump_stats(f'{base}.pstats')
+            sampler.write(f'{base}.collapsed')
+    return wrapper
@@ -0,0 +1,172 @@
+import numpy as np
+
+# Sub-second throughput of a stream of event times in ns (arrivals at T2 or
+# writes at T5): the gaps between consecutive events, the busiest 1/10/100 ms
+# windows, and the stalls, i.e. gaps longer than a threshold. Everything is
+# computed on the sorted times with np.diff and np.searchsorted, so a day of
+# millions of events takes a fraction of a second.
+
+NS_PER_SECOND = 1_000_000_000
+WINDOWS = {'1ms': 1_000_000, '10ms': 10_000_000, '100ms': 100_000_000}
+GAP_PERCENTILES = {'p50': 50, 'p99': 99, 'p99.9': 99.9}
+# Stall thresholds to choose from; gaps of at least the smallest are kept
+STALL_THRESHOLDS = {'10 ms': 10_000_000, '100 ms': 100_000_000, '1 s': NS_PER_SECOND, '5 s': 5 * NS_PER_SECOND}
+# The largest gaps are kept whatever their length
+TOP_GAPS = 20
+
+
+# Latencies (float ns) as whole ns to add to times, rounded rather than
+# truncated, so every stage time of an event comes out the same in the
+# throughput and the queue depth panels
+def latency_ns(values):
+    return np.rint(values).astype(np.int64)
+
+
+# Sorted event times in ns: T2, or T5 as T2 plus T5-T2 where that is known
+def event_times(t2, latency=None):
+    times = t2.view(np.int64) if t2.dtype.kind == 'M' else t2
+    if latency is not None:
+        known = ~np.isnan(latency)
+        times = times[known] + latency_ns(latency[known])
+    return np.sort(times)
+
+
+# Events in [t, t + window) for a window starting at every event; the
+# busiest window of the day always starts at an event
+def window_counts(times, window):
+    return np.searchsorted(times, times + window, side='left') - np.arange(len(times))
+
+
+def gap_summary(times):
+    summary = {'events': int(len(times))}
+    if len(times) < 2:
+        return summary
+    gaps = np.diff(times)
+    span = int(times[-1] - times[0])
+    summary.update({
+        'first': int(times[0]),
+        'last': int(times[-1]),
+        'mean_rate': (len(times) - 1) / span * NS_PER_SECOND if span else None,
+        **{name: float(value) for name, value in zip(GAP_PERCENTILES, np.percentile(gaps, list(GAP_PERCENTILES.values())))},
+        'max': int(gaps.max()),
+    })
+    return summary
+
+
+# The busiest window of each size: its event count, start and rate per second
+def burst_summary(times):
+    bursts = {}
+    for name, window in WINDOWS.items():
+        if len(times) == 0:
+            continue
+        counts = window_counts(times, window)
+        peak = int(np.argmax(counts))
+        bursts[name] = {'events': int(counts[peak]), 'start': int(times[peak]),
+                        'rate': float(counts[peak] / window * NS_PER_SECOND)}
+    return bursts
+
+
+# Start and end of every gap of at least min_gap, and of the top largest
+# gaps, in time order
+def gap_windows(times, min_gap=min(STALL_THRESHOLDS.values()), top=TOP_GAPS):
+    gaps = np.diff(times)
+    keep = np.flatnonzero(gaps >= min_gap)
+    if len(gaps) > top:
+        keep = np.union1d(keep, np.argpartition(gaps, -top)[-top:])
+    else:
+        keep = np.arange(len(gaps))
+    return times[keep], times[keep + 1]
+
+
+# Per second with events: its start (ns), its number of events and, for
+# every window size, the most events in one window starting in it. Sorted
+# times make each second a contiguous run, reduced with np.maximum.reduceat.
+def per_second_peaks(times):
+    if len(times) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), {name: np.array([], dtype=np.int64) for name in WINDOWS}
+    seconds = times // NS_PER_SECOND
+    starts = np.flatnonzero(np.diff(seconds, prepend=seconds[0] - 1))
+    events = np.diff(np.append(starts, len(times)))
+    peaks = {name: np.maximum.reduceat(window_counts(times, window), starts) for name, window in WINDOWS.items()}
+    return seconds[starts] * NS_PER_SECOND, events, peaks
+
+
+# Queue depth: how many events are inside each hop of the pipeline at any
+# moment. A hop is named like its latency column and runs from the stage
+# an event enters it at to the stage it leaves at. Stage times are T2 plus
+# or minus the latencies, each a signed sum of latency columns.
+QUEUE_HOPS = {'T2-T1': ('T1', 'T2'), 'T3-T2': ('T2', 'T3'), 'T4-T3': ('T3', 'T4'), 'T5-T4': ('T4', 'T5'), 'T5-T2': ('T2', 'T5')}
+STAGE_OFFSETS = {'T1': [(-1, 'T2-T1')], 'T2': [], 'T3': [(1, 'T3-T2')], 'T4': [(1, 'T3-T2'), (1, 'T4-T3')], 'T5': [(1, 'T5-T2')]}
+
+
+# A stage's time of every event (ns) and whether it is known
+def stage_times(t2, latencies, stage):
+    times = t2.view(np.int64) if t2.dtype.kind == 'M' else t2.copy()
+    known = np.ones(len(times), dtype=bool)
+    for sign, column in STAGE_OFFSETS[stage]:
+        values = latencies[column]
+        known &= ~np.isnan(values)
+        times = times + sign * latency_ns(np.nan_to_num(values))
+    return times, known
+
+
+# Entry and exit times of the events that passed through a hop, leaving out
+# events with either time unknown or leaving before they entered
+def hop_times(t2, latencies, hop):
+    entry, entry_known = stage_times(t2, latencies, QUEUE_HOPS[hop][0])
+    exit, exit_known = stage_times(t2, latencies, QUEUE_HOPS[hop][1])
+    keep = entry_known & exit_known & (exit >= entry)
+    return entry[keep], exit[keep]
+
+
+# Every time the depth changes and the depth after it: entries count +1 and
+# exits -1, merged in one sort (exits first at equal times, so an event with
+# no latency is never in flight) and summed
+def queue_depth(entries, exits):
+    times = np.concatenate([exits, entries])
+    steps = np.concatenate([np.full(len(exits), -1, dtype=np.int64), np.ones(len(entries), dtype=np.int64)])
+    order = np.argsort(times, kind='stable')
+    return times[order], np.cumsum(steps[order])
+
+
+# Highest and time-weighted mean depth in each second of [start, stop) (ns,
+# whole seconds). The depth at each second's start is the one after the
+# last change before it; the mean integrates the step function through the
+# running area under it.
+def per_second_depth(times, depth, start, stop):
+    edges = np.arange(start, stop + 1, NS_PER_SECOND)
+    if len(times) == 0:
+        empty = np.zeros(len(edges) - 1, dtype=np.int64)
+        return empty, empty.astype('float64')
+    last = np.searchsorted(times, edges, side='right') - 1
+    before = last >= 0
+    last = np.maximum(last, 0)
+    at_edge = np.where(before, depth[last], 0)
+
+    area = np.concatenate([[0.0], np.cumsum(depth[:-1] * np.diff(times).astype('float64'))])
+    area_at_edge = np.where(before, area[last] + depth[last] * (edges - times[last]).astype('float64'), 0.0)
+    mean = np.diff(area_at_edge) / NS_PER_SECOND
+
+    peak = at_edge[:-1].copy()
+    inside = (times >= start) & (times < stop)
+    seconds = (times[inside] - start) // NS_PER_SECOND
+    if len(seconds):
+        present, first = np.unique(seconds, return_index=True)
+        peak[present] = np.maximum(peak[present], np.maximum.reduceat(depth[inside], first))
+    return peak, mean
+
+
+# Start of every second of the day's span, and the highest and mean depth of
+# every hop in each (as '<hop>-max' and '<hop>-mean')
+def queue_depth_series(t2, latencies):
+    hops = {hop: hop_times(t2, latencies, hop) for hop in QUEUE_HOPS
+            if all(column in latencies for stage in QUEUE_HOPS[hop] for _, column in STAGE_OFFSETS[stage])}
+    present = [times for entries, exits in hops.values() for times in (entries, exits) if len(times)]
+    if not present:
+        return np.array([], dtype=np.int64), {}
+    start = min(times.min() for times in present) // NS_PER_SECOND * NS_PER_SECOND
+    stop = -(-max(times.max() + 1 for times in present) // NS_PER_SECOND) * NS_PER_SECOND
+    series = {}
+    for hop, (entries, exits) in hops.items():
+        series[f'{hop}-max'], series[f'{hop}-mean'] = per_second_depth(*queue_depth(entries, exits), start, stop)
+    return np.arange(start, stop, NS_PER_SECOND), series